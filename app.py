@@ -1,13 +1,27 @@
+import time
+RUN_STARTED = time.perf_counter() # before the other imports, so a cold first run counts them
+
 import streamlit as st
 import os
-import time
 import json
 import uuid
-import hashlib
+import html
 from datetime import datetime
 from pathlib import Path
-from dotenv import load_dotenv
-import google.generativeai as genai
+from core.auth_store import JsonAuthStore, SqliteAuthStore
+from core.backends import GeminiBackend, LocalBackend
+from core.cache import ResponseCache
+from core.catalog import ChatCatalog
+from core.chatlog import ChatStore
+from core.engine import ChatEngine, quota_message
+from core.metrics import Metrics, summarize_jsonl
+from core.models import ModelPool
+from core.passwords import PasswordHasher
+from core.plugin_manager import PluginManager
+from core.render import coalesce, prepare_markdown, window_start
+from core.search import ChatSearchIndex
+from core.scheduler import Scheduler
+from core.usage import QuotaExceeded, UsageMeter
 
 # --- 1. PAGE CONFIGURATION ---
 st.set_page_config(
@@ -19,18 +33,55 @@ st.set_page_config(
 
 # --- 2. DATA SETUP ---
 BASE_DIR = Path(__file__).parent
+STATIC_DIR = BASE_DIR / "static"
 DATA_DIR = BASE_DIR / "data"
 CHATS_DIR = DATA_DIR / "chats"
 USERS_FILE = DATA_DIR / "users.json"
 SESSIONS_FILE = DATA_DIR / "sessions.json" # NEW: For remembering logins
-
-CHATS_DIR.mkdir(parents=True, exist_ok=True)
-
-if not USERS_FILE.exists():
-    with open(USERS_FILE, "w") as f: json.dump({}, f)
-    
-if not SESSIONS_FILE.exists():
-    with open(SESSIONS_FILE, "w") as f: json.dump({}, f)
+AUTH_DB_FILE = DATA_DIR / "auth.db"
+AUTH_BACKEND = os.getenv("KAI_AUTH_BACKEND", "json") # "json" or "sqlite"
+SESSION_TTL = float(os.getenv("KAI_SESSION_TTL", str(30 * 86400))) # seconds a login is remembered
+PASSWORD_SCHEME = os.getenv("KAI_PASSWORD_SCHEME", "scrypt") # "scrypt" or "pbkdf2_sha256", see bench/passwords.py
+SCRYPT_N = int(os.getenv("KAI_SCRYPT_N", str(2 ** 14)))
+PBKDF2_ITERATIONS = int(os.getenv("KAI_PBKDF2_ITERATIONS", "600000"))
+CATALOG_FILE = DATA_DIR / "catalog.db"
+SEARCH_INDEX_FILE = DATA_DIR / "search.db"
+HISTORY_PAGE_SIZE = 20
+CHAT_STORAGE = os.getenv("KAI_CHAT_STORAGE", "log") # "log" (append-only) or "json" (full rewrite)
+CHAT_COMPACT_EVERY = 50
+RENDER_WINDOW = max(1, int(os.getenv("KAI_RENDER_WINDOW", "20"))) # messages shown before "load earlier"
+METRICS_FILE = DATA_DIR / "metrics.jsonl" # rolling span/counter log
+METRICS_PROM_FILE = DATA_DIR / "metrics.prom" # Prometheus text format, for node_exporter's textfile collector
+ADMIN_USERS = {u.strip() for u in os.getenv("KAI_ADMIN_USERS", "").split(",") if u.strip()}
+
+@st.cache_resource
+def init_data_dirs():
+    """One-time filesystem setup; cached so reruns skip the mkdir/exists calls."""
+    CHATS_DIR.mkdir(parents=True, exist_ok=True)
+    if not USERS_FILE.exists():
+        with open(USERS_FILE, "w") as f: json.dump({}, f)
+    if not SESSIONS_FILE.exists():
+        with open(SESSIONS_FILE, "w") as f: json.dump({}, f)
+    return {"first_render": None} # per-process startup facts, filled in by the first completed run
+
+PROCESS = init_data_dirs()
+
+@st.cache_resource
+def get_metrics():
+    return Metrics(METRICS_FILE, METRICS_PROM_FILE)
+
+@st.cache_resource
+def get_catalog():
+    """One chat catalog per process, shared by every session."""
+    return ChatCatalog(CATALOG_FILE, CHATS_DIR)
+
+@st.cache_resource
+def get_search_index():
+    return ChatSearchIndex(SEARCH_INDEX_FILE, CHATS_DIR)
+
+@st.cache_resource
+def get_chat_store():
+    return ChatStore(CHATS_DIR, mode=CHAT_STORAGE, compact_every=CHAT_COMPACT_EVERY)
 
 # --- 3. SESSION STATE INITIALIZATION ---
 if "logged_in" not in st.session_state:
@@ -43,39 +94,44 @@ if "messages" not in st.session_state:
     st.session_state.messages = []
 if "session_id" not in st.session_state:
     st.session_state.session_id = str(uuid.uuid4())
+if "summary" not in st.session_state:
+    st.session_state.summary = None # rolling summary of turns that fell out of the context window
+if "render_window" not in st.session_state:
+    st.session_state.render_window = RENDER_WINDOW
+if "history_page" not in st.session_state:
+    st.session_state.history_page = 0
 
 # --- 4. AUTHENTICATION & SESSION MANAGER ---
+@st.cache_resource
+def get_password_hasher():
+    cost = {"n": SCRYPT_N} if PASSWORD_SCHEME == "scrypt" else {"iterations": PBKDF2_ITERATIONS}
+    return PasswordHasher(PASSWORD_SCHEME, **cost)
+
 def hash_password(password):
-    return hashlib.sha256(password.encode()).hexdigest()
+    return get_password_hasher().hash(password)
 
-def load_users():
-    try:
-        with open(USERS_FILE, "r") as f: return json.load(f)
-    except: return {}
+@st.cache_resource
+def get_auth_store():
+    """Shared by every session so token lookups are served from memory."""
+    if AUTH_BACKEND == "sqlite": return SqliteAuthStore(AUTH_DB_FILE, SESSION_TTL, users_file=USERS_FILE, sessions_file=SESSIONS_FILE)
+    return JsonAuthStore(USERS_FILE, SESSIONS_FILE, SESSION_TTL)
 
 def save_user(username, password):
-    users = load_users()
-    if username in users: return False
-    users[username] = hash_password(password)
-    with open(USERS_FILE, "w") as f: json.dump(users, f, indent=4)
-    return True
+    return get_auth_store().add_user(username, hash_password(password))
 
 def verify_login(username, password):
-    users = load_users()
-    if username in users and users[username] == hash_password(password):
+    stored = get_auth_store().get_user(username)
+    if stored is not None and get_password_hasher().verify(password, stored):
+        # Upgrade legacy SHA-256 hashes (or old cost settings) while we have the plaintext
+        if get_password_hasher().needs_rehash(stored):
+            get_auth_store().set_password(username, hash_password(password))
         return True
     return False
 
 # --- NEW: AUTO-LOGIN LOGIC ---
 def create_session(username):
     """Creates a token and saves it to keep user logged in."""
-    token = str(uuid.uuid4())
-    try:
-        with open(SESSIONS_FILE, "r") as f: sessions = json.load(f)
-    except: sessions = {}
-    
-    sessions[token] = username
-    with open(SESSIONS_FILE, "w") as f: json.dump(sessions, f)
+    token = get_auth_store().create_session(username)
     
     # Set token in URL so browser remembers it on refresh
     st.query_params["token"] = token 
@@ -89,25 +145,19 @@ def check_session():
     token = params.get("token", None)
     
     if token:
-        try:
-            with open(SESSIONS_FILE, "r") as f: sessions = json.load(f)
-            if token in sessions:
-                st.session_state.username = sessions[token]
-                st.session_state.logged_in = True
-                return True
-        except: pass
+        with get_metrics().span("auth_check"): username = get_auth_store().session_user(token)
+        if username:
+            st.session_state.username = username
+            st.session_state.logged_in = True
+            return True
     return False
 
 def logout():
-    # Remove session from file
+    # Remove session from store
     params = st.query_params
     token = params.get("token", None)
     if token:
-        try:
-            with open(SESSIONS_FILE, "r") as f: sessions = json.load(f)
-            if token in sessions:
-                del sessions[token]
-                with open(SESSIONS_FILE, "w") as f: json.dump(sessions, f)
+        try: get_auth_store().delete_session(token)
         except: pass
 
     # Clear state
@@ -115,6 +165,7 @@ def logout():
     st.session_state.logged_in = False
     st.session_state.username = None
     st.session_state.messages = []
+    st.session_state.summary = None
     st.rerun()
 
 # --- 5. CHAT STORAGE & DELETION ---
@@ -129,59 +180,61 @@ def get_chat_title(messages):
 def save_chat_history():
     if not st.session_state.messages: return
     current_title = get_chat_title(st.session_state.messages)
-    file_path = CHATS_DIR / f"{st.session_state.session_id}.json"
-    
-    chat_data = {
-        "id": st.session_state.session_id,
-        "username": st.session_state.username,
-        "title": current_title,
-        "timestamp": datetime.now().isoformat(),
-        "messages": st.session_state.messages
-    }
-    with open(file_path, "w") as f: json.dump(chat_data, f, indent=4)
+    chat_id = st.session_state.session_id
+    with get_metrics().span("chat_save"):
+        timestamp = get_chat_store().save(chat_id, st.session_state.username, current_title, st.session_state.messages, st.session_state.summary)
+        get_catalog().upsert(chat_id, st.session_state.username, f"{chat_id}.json", current_title, timestamp)
+        get_search_index().add(chat_id, st.session_state.username, st.session_state.messages)
 
 def load_chat_from_file(filename):
-    file_path = CHATS_DIR / filename
     try:
-        with open(file_path, "r") as f:
-            data = json.load(f)
-            if data.get("username") != st.session_state.username:
-                st.error("Access Denied.")
-                return
-            st.session_state.messages = data["messages"]
-            st.session_state.session_id = data["id"]
-            st.session_state.page = "home"
-            st.rerun()
+        data = get_chat_store().load(Path(filename).stem)
+        if data.get("username") != st.session_state.username:
+            st.error("Access Denied.")
+            return
+        st.session_state.messages = data["messages"]
+        st.session_state.summary = data.get("summary")
+        st.session_state.render_window = RENDER_WINDOW
+        st.session_state.session_id = data["id"]
+        st.session_state.page = "home"
+        st.rerun()
     except Exception as e: st.error(f"Error: {e}")
 
 def delete_chat_file(filename):
     """Permanently deletes a chat file."""
-    file_path = CHATS_DIR / filename
+    chat_id = Path(filename).stem
     try:
-        if file_path.exists():
-            os.remove(file_path)
+        if get_chat_store().exists(chat_id):
+            get_chat_store().delete(chat_id)
+            get_catalog().remove(chat_id)
+            get_search_index().remove(chat_id)
             st.toast("Chat Deleted Successfully")
             time.sleep(0.5)
             st.rerun()
     except Exception as e: st.error(f"Delete Failed: {e}")
 
-def get_my_history():
-    my_chats = []
-    files = list(CHATS_DIR.glob("*.json"))
-    files.sort(key=os.path.getmtime, reverse=True)
-    for f in files:
-        try:
-            with open(f, "r") as file:
-                data = json.load(file)
-                if data.get("username") == st.session_state.username:
-                    my_chats.append({
-                        "filename": f.name,
-                        "title": data.get("title", "Untitled"),
-                        "timestamp": data.get("timestamp", ""),
-                        "id": data.get("id", "")
-                    })
-        except: continue
-    return my_chats
+def get_my_history(page=0, per_page=HISTORY_PAGE_SIZE):
+    """One page of the current user's chats from the catalog, newest first."""
+    with get_metrics().span("history_load", kind="page"):
+        return get_catalog().page(st.session_state.username, page * per_page, per_page)
+
+def count_my_history():
+    return get_catalog().count(st.session_state.username)
+
+def search_my_history(query, limit=HISTORY_PAGE_SIZE):
+    """Ranked full-text hits in the current user's chats, best message per chat."""
+    results, seen = [], set()
+    with get_metrics().span("history_load", kind="search"):
+        hits = get_search_index().search(st.session_state.username, query, limit * 3)
+    for hit in hits:
+        if hit["chat_id"] in seen: continue
+        chat = get_catalog().get(hit["chat_id"])
+        if not chat: continue
+        seen.add(hit["chat_id"])
+        snippet = html.escape(hit["snippet"]).replace("\x02", "<mark>").replace("\x03", "</mark>")
+        results.append(dict(chat, snippet=snippet))
+        if len(results) >= limit: break
+    return results
 
 def navigate_to(page):
     st.session_state.page = page
@@ -190,170 +243,112 @@ def navigate_to(page):
 def start_new_chat():
     st.session_state.session_id = str(uuid.uuid4())
     st.session_state.messages = []
+    st.session_state.summary = None
+    st.session_state.render_window = RENDER_WINDOW
     navigate_to("home")
 
 # --- 6. AI ENGINE ---
-try:
-    key = st.secrets["GEMINI_API_KEY"]
-except:
-    load_dotenv()
-    key = os.getenv("GEMINI_API_KEY")
-
-def stream_ai_response(prompt):
-    if not key: yield "System Error: API Key missing."; return
-    genai.configure(api_key=key)
-    models = ["gemini-flash-latest", "gemini-pro"]
-    active_model = None
-    for m in models:
-        try:
-            test_model = genai.GenerativeModel(m)
-            active_model = test_model
-            break
-        except: continue
-    if not active_model: yield "Connection Failed."; return
-    try:
-        response = active_model.generate_content(prompt, stream=True)
-        for chunk in response:
-            for char in chunk.text: yield char; time.sleep(0.005)
-    except Exception as e: yield f"Error: {str(e)}"
+@st.cache_resource
+def get_api_key():
+    """Resolved once per process. The Gemini SDK itself is only imported when the model pool is built on the first prompt."""
+    try: return st.secrets["GEMINI_API_KEY"]
+    except:
+        from dotenv import load_dotenv
+        load_dotenv()
+        return os.getenv("GEMINI_API_KEY")
+
+key = get_api_key()
+
+MODELS = ["gemini-flash-latest", "gemini-pro"]
+MODEL_BACKEND = os.getenv("KAI_MODEL_BACKEND", "gemini") # "gemini" or "local" (offline, deterministic; for load tests)
+LOCAL_TTFT = float(os.getenv("KAI_LOCAL_TTFT", "0.3")) # seconds before the local backend's first chunk
+LOCAL_TOKENS_PER_SEC = float(os.getenv("KAI_LOCAL_TOKENS_PER_SEC", "40")) or None
+LOCAL_RESPONSES = os.getenv("KAI_LOCAL_RESPONSES") or None # JSON file of {prompt: canned response}
+# Responses cached from one backend are never served for another
+CACHE_MODELS = MODELS if MODEL_BACKEND == "gemini" else [MODEL_BACKEND] + MODELS
+RENDER_INTERVAL = float(os.getenv("KAI_RENDER_INTERVAL", "0.05")) # seconds between UI updates while streaming
+RENDER_MAX_CHUNKS = int(os.getenv("KAI_RENDER_MAX_CHUNKS", "0")) or None
+CONTEXT_TOKEN_BUDGET = int(os.getenv("KAI_CONTEXT_TOKENS", "6000")) # history sent with each prompt
+CACHE_FILE = DATA_DIR / "response_cache.db"
+CACHE_TTL = float(os.getenv("KAI_CACHE_TTL", "86400"))
+CACHE_MAX_ITEMS = 256
+CACHE_MAX_BYTES = 50 * 1024 * 1024
+MAX_CONCURRENT_CALLS = int(os.getenv("KAI_MAX_CONCURRENT", "4")) # upstream calls in flight across all sessions
+RATE_PER_MINUTE = int(os.getenv("KAI_RATE_PER_MINUTE", "0")) or None
+REQUEST_TIMEOUT = float(os.getenv("KAI_REQUEST_TIMEOUT", "120"))
+USAGE_FILE = DATA_DIR / "usage.json"
+DAILY_TOKEN_QUOTA = int(os.getenv("KAI_DAILY_TOKENS", "0")) or None # per user, prompt + response
+MINUTE_TOKEN_QUOTA = int(os.getenv("KAI_MINUTE_TOKENS", "0")) or None
+PROMPT_PRICE = float(os.getenv("KAI_PROMPT_PRICE", "0")) # USD per 1k tokens, for the usage view
+RESPONSE_PRICE = float(os.getenv("KAI_RESPONSE_PRICE", "0"))
+
+def model_ready():
+    return MODEL_BACKEND != "gemini" or bool(key)
+
+@st.cache_resource
+def get_model_pool():
+    """Configured once per process; clients, health checks and circuit breakers are shared by all sessions."""
+    if MODEL_BACKEND == "local": backend = LocalBackend(LOCAL_RESPONSES, LOCAL_TTFT, LOCAL_TOKENS_PER_SEC)
+    else: backend = GeminiBackend(key)
+    return ModelPool(MODELS, backend)
+
+@st.cache_resource
+def get_response_cache():
+    return ResponseCache(CACHE_FILE, CACHE_MAX_ITEMS, CACHE_TTL, CACHE_MAX_BYTES)
+
+@st.cache_resource
+def get_scheduler():
+    return Scheduler(MAX_CONCURRENT_CALLS, RATE_PER_MINUTE, timeout=REQUEST_TIMEOUT)
+
+@st.cache_resource
+def get_usage_meter():
+    return UsageMeter(USAGE_FILE, DAILY_TOKEN_QUOTA, MINUTE_TOKEN_QUOTA, PROMPT_PRICE, RESPONSE_PRICE)
+
+@st.cache_resource
+def get_chat_engine():
+    return ChatEngine(get_model_pool(), get_scheduler(), get_response_cache(), get_usage_meter(), get_metrics(),
+                      CACHE_MODELS, model_ready(), CONTEXT_TOKEN_BUDGET)
+
+def stream_ai_response(prompt, history=()):
+    return get_chat_engine().stream(st.session_state.username, st.session_state.session_id, prompt, history)
+
+# --- PLUGINS ---
+PLUGINS_DIR = BASE_DIR / "plugins"
+# The vault, chain and web fetcher are shared by the whole server, so only admins may use them
+PLUGIN_ADMIN_COMMANDS = {"note", "vault_read", "vault_list", "log", "chain_view", "chain_verify", "search", "fetch", "ask"}
+# Input and output of these never reach the chat history, the search index or the model
+PLUGIN_SECRET_COMMANDS = {"note", "vault_read", "vault_list"}
+
+def get_secret(name, default=""):
+    try: return st.secrets[name]
+    except: return os.getenv(name, default)
+
+@st.cache_resource
+def get_plugin_manager():
+    """Command table is read from plugin sources; plugin modules import on first use."""
+    config = {
+        "CHAIN_FILE": DATA_DIR / "chain.jsonl",
+        "VAULT_FILE": DATA_DIR / "vault.bin",
+        "ENCRYPTION_KEY": get_secret("ENCRYPTION_KEY"), # 64 hex chars (AES-256)
+        "SYSTEM_SAMPLE_INTERVAL": float(os.getenv("KAI_SYSTEM_SAMPLE_INTERVAL", "2")), # seconds between /system samples
+        "SYSTEM_SAMPLE_SIZE": 300,
+        "SEARCH_URL": os.getenv("KAI_SEARCH_URL", "https://html.duckduckgo.com/html/?q={query}"),
+        "WEB_CACHE_DIR": DATA_DIR / "web_cache",
+    }
+    return PluginManager(PLUGINS_DIR, config, admin_only=PLUGIN_ADMIN_COMMANDS, secret=PLUGIN_SECRET_COMMANDS)
 
 # --- 7. CSS STYLING ---
-st.markdown("""
-    <style>
-        @import url('https://fonts.googleapis.com/css2?family=Rajdhani:wght@500;700&family=Inter:wght@400;600&display=swap');
-
-        :root {
-            --bg-color: #0a0a12;        
-            --neon-blue: #00f3ff;
-            --neon-purple: #bc13fe;
-            --text-main: #ffffff;
-            --border-color: rgba(255, 255, 255, 0.1);
-            --danger-red: #ff3333;
-        }
-
-        html, body, [class*="css"] {
-            font-family: 'Inter', sans-serif;
-            background-color: var(--bg-color) !important;
-            color: var(--text-main) !important;
-        }
-
-        /* BACKGROUND */
-        .stApp {
-            background: radial-gradient(circle at 20% 20%, rgba(188, 19, 254, 0.15) 0%, transparent 40%),
-                        radial-gradient(circle at 80% 80%, rgba(0, 243, 255, 0.15) 0%, transparent 40%),
-                        var(--bg-color);
-            background-attachment: fixed;
-            margin-top: 60px;
-        }
-
-        /* LOGIN CONTAINER */
-        div[data-testid="column"]:nth-of-type(2) {
-            background: rgba(20, 20, 35, 0.9);
-            border: 1px solid var(--neon-purple);
-            border-radius: 20px;
-            padding: 30px;
-            box-shadow: 0 0 40px rgba(188, 19, 254, 0.15);
-            text-align: center;
-        }
-
-        /* NAVBAR */
-        div[data-testid="stVerticalBlock"] > div:first-child > div[data-testid="stHorizontalBlock"] {
-            position: fixed;
-            top: 0; left: 0; width: 100vw; height: 70px;
-            background: rgba(10, 10, 18, 0.95);
-            backdrop-filter: blur(15px);
-            border-bottom: 1px solid var(--border-color);
-            z-index: 99999;
-            padding: 0 30px;
-            align-items: center;
-            margin-top: 0 !important;
-        }
-
-        /* BUTTONS */
-        div.stButton > button {
-            background: transparent !important;
-            border: 1px solid transparent !important;
-            color: #ccc !important;
-            font-family: 'Rajdhani', sans-serif !important;
-            font-weight: 600 !important;
-            font-size: 0.95rem !important;
-            transition: 0.3s;
-            padding: 5px 15px !important;
-            width: 100%;
-        }
-        div.stButton > button:hover {
-            color: var(--neon-blue) !important;
-            border: 1px solid var(--neon-blue) !important;
-            background: rgba(0, 243, 255, 0.1) !important;
-        }
-        
-        /* LOGO BUTTON STYLE */
-        div[data-testid="column"]:first-child button {
-            font-size: 1.6rem !important;
-            font-weight: 800 !important;
-            background: linear-gradient(90deg, var(--neon-blue), var(--neon-purple));
-            -webkit-background-clip: text !important;
-            -webkit-text-fill-color: transparent !important;
-            border: none !important;
-            text-align: left !important;
-            padding-left: 0 !important;
-        }
-        div[data-testid="column"]:first-child button:hover {
-            box-shadow: none !important;
-            border: none !important;
-            background: transparent !important;
-        }
-        
-        /* DELETE BUTTON SPECIFIC STYLE */
-        /* We can't target just one button easily in pure Streamlit CSS without custom components, 
-           but the button text "DEL" will be small enough. */
-
-        /* INPUT BOX */
-        .stChatInput { padding-bottom: 100px !important; }
-        .stChatInput textarea {
-            background-color: rgba(0,0,0,0.5) !important;
-            border: 1px solid var(--border-color) !important;
-            color: white !important;
-            border-radius: 12px !important;
-        }
-        .stChatInput textarea:focus {
-            border-color: var(--neon-blue) !important;
-            box-shadow: 0 0 20px rgba(0, 243, 255, 0.2) !important;
-        }
-
-        /* WATERMARK */
-        .watermark {
-            position: fixed; top: 50%; left: 50%;
-            transform: translate(-50%, -50%);
-            font-size: 15vw; font-weight: 900;
-            color: rgba(255,255,255,0.05);
-            pointer-events: none; z-index: 0;
-            font-family: 'Rajdhani', sans-serif;
-            white-space: nowrap;
-        }
-
-        section[data-testid="stSidebar"], header[data-testid="stHeader"], div[data-testid="stToolbar"] { display: none !important; }
-        
-        .content-card {
-            background: rgba(20, 20, 35, 0.7);
-            border: 1px solid var(--border-color);
-            border-radius: 20px;
-            padding: 30px;
-            margin-bottom: 20px;
-            backdrop-filter: blur(10px);
-        }
-    </style>
-""", unsafe_allow_html=True)
+@st.cache_resource
+def load_static(name):
+    """Read a file from static/ once per process; reruns reuse the string."""
+    return (STATIC_DIR / name).read_text(encoding="utf-8")
+
+st.markdown(f"<style>\n{load_static('style.css')}</style>", unsafe_allow_html=True)
 
 # --- 8. AUTH PAGE ---
 def login_page():
     st.markdown('<div class="watermark">KITKAT AI</div>', unsafe_allow_html=True)
-    st.markdown("""
-        <div style="text-align: center; margin-top: 50px; margin-bottom: 30px;">
-            <h1 style="font-family:'Rajdhani'; font-size:4rem; background:linear-gradient(to right, #00f3ff, #bc13fe); -webkit-background-clip:text; -webkit-text-fill-color:transparent;">KITKAT AI</h1>
-            <p style="color:#888; letter-spacing:2px;">SECURE NEURAL INTERFACE v5.0</p>
-        </div>
-    """, unsafe_allow_html=True)
+    st.markdown(load_static("login_header.html"), unsafe_allow_html=True)
     
     col1, col2, col3 = st.columns([1, 1, 1])
     with col2:
@@ -386,7 +381,9 @@ else:
     
     # NAVBAR
     with st.container():
-        col_logo, col_space, col_h, col_n, col_hist, col_a, col_l = st.columns([2.5, 3, 0.8, 0.8, 0.8, 0.8, 0.8], gap="small")
+        is_admin = st.session_state.username in ADMIN_USERS
+        col_logo, col_space, col_h, col_n, col_hist, col_a, *col_ops, col_l = st.columns(
+            [2.5, 2.2 if is_admin else 3] + [0.8] * (6 if is_admin else 5), gap="small")
         with col_logo:
             if st.button("KITKAT AI"): navigate_to("home")
         with col_h: 
@@ -397,6 +394,9 @@ else:
             if st.button("📜 Logs"): navigate_to("history")
         with col_a: 
             if st.button("ℹ️ Info"): navigate_to("about")
+        if is_admin:
+            with col_ops[0]:
+                if st.button("📊 Ops"): navigate_to("metrics")
         with col_l: 
             if st.button("🔒 Exit"): logout()
 
@@ -410,41 +410,85 @@ else:
                 </div>
             """, unsafe_allow_html=True)
 
-        for msg in st.session_state.messages:
-            with st.chat_message(msg["role"]): st.markdown(msg["content"])
-
-        if prompt := st.chat_input("Enter command..."):
-            st.session_state.messages.append({"role": "user", "content": prompt})
+        # Only the newest messages are sent to the browser on each rerun
+        start = window_start(st.session_state.messages, st.session_state.render_window)
+        if start > 0:
+            if st.button(f"⬆ Load earlier ({start} hidden)", key="load_earlier"):
+                st.session_state.render_window += RENDER_WINDOW; st.rerun()
+        for msg in st.session_state.messages[start:]:
+            with st.chat_message(msg["role"]): st.markdown(prepare_markdown(msg["content"]))
+
+        if prompt := st.chat_input("Enter command... (/help for plugins)"):
+            route = get_plugin_manager().resolve(prompt)
+            secret = bool(route) and get_plugin_manager().is_secret(route[0]) and get_plugin_manager().allowed(route[0], is_admin)
+            if not secret: st.session_state.messages.append({"role": "user", "content": prompt})
             with st.chat_message("user"): st.markdown(prompt)
 
             with st.chat_message("assistant"):
                 ph = st.empty()
-                full_res = ""
-                ph.markdown("`Thinking...`")
-                for chunk in stream_ai_response(prompt):
-                    full_res += chunk
-                    ph.markdown(full_res + "▌")
+                model_prompt = prompt
+                if route:
+                    # "/command args" goes to a plugin instead of the model
+                    ph.markdown(f"`Running {route[0]}...`")
+                    def progress(elapsed): ph.markdown(f"`Running {route[0]}... {elapsed:.0f}s`")
+                    with get_metrics().span("plugin", command=route[0]):
+                        result = get_plugin_manager().run(*route, is_admin=is_admin, progress=progress)
+                    if isinstance(result, dict): model_prompt = result["prompt"] # plugin wants the model to answer
+                    else: model_prompt = None; full_res = f"```\n{result}\n```"
+                if model_prompt is not None:
+                    parts = []
+                    ph.markdown("`Thinking...`")
+                    try:
+                        history, st.session_state.summary = get_chat_engine().build_context(
+                            st.session_state.username, st.session_state.session_id, st.session_state.messages[:-1], st.session_state.summary)
+                        replies = stream_ai_response(model_prompt, history)
+                    except QuotaExceeded as e: replies = iter([quota_message(e)])
+                    for batch in coalesce(replies, RENDER_INTERVAL, RENDER_MAX_CHUNKS):
+                        parts.extend(batch)
+                        ph.markdown("".join(parts) + "▌")
+                    full_res = "".join(parts)
                 ph.markdown(full_res)
-            
-            st.session_state.messages.append({"role": "assistant", "content": full_res})
-            save_chat_history()
+                if secret: st.caption("🔒 Private result: not saved to this chat and never sent to the model.")
+
+            if not secret:
+                st.session_state.messages.append({"role": "assistant", "content": full_res})
+                save_chat_history()
 
     elif st.session_state.page == "history":
         st.markdown('<div style="margin-top:20px;"></div>', unsafe_allow_html=True)
         st.title("📜 ENCRYPTED LOGS")
-        my_chats = get_my_history()
+        with st.expander("📈 Usage"):
+            meter = get_usage_meter()
+            days = meter.user_days(st.session_state.username)
+            today = days[0] if days and days[0]["day"] == meter.day() else None
+            used = today["prompt_tokens"] + today["response_tokens"] if today else 0
+            st.caption(f"TODAY // {used} TOKENS" + (f" OF {DAILY_TOKEN_QUOTA} ({used / DAILY_TOKEN_QUOTA:.0%})" if DAILY_TOKEN_QUOTA else "")
+                       + (f" · {MINUTE_TOKEN_QUOTA} / MIN LIMIT" if MINUTE_TOKEN_QUOTA else ""))
+            if not days: st.info("No model usage recorded yet.")
+            else:
+                st.table([{"day": d["day"], "requests": d["requests"], "prompt tokens": d["prompt_tokens"],
+                           "response tokens": d["response_tokens"], "cost $": round(d["cost"], 4)} for d in days])
+                sessions = meter.user_sessions(st.session_state.username, HISTORY_PAGE_SIZE)
+                st.table([{"chat": (get_catalog().get(r["session_id"]) or {}).get("title", "Untitled"), "requests": r["requests"],
+                           "tokens": r["prompt_tokens"] + r["response_tokens"], "cost $": round(r["cost"], 4)} for r in sessions])
+        query = st.text_input("Search logs", placeholder="Search your conversations...", label_visibility="collapsed")
+        total = count_my_history()
+        pages = max(1, -(-total // HISTORY_PAGE_SIZE))
+        st.session_state.history_page = min(st.session_state.history_page, pages - 1)
+        my_chats = search_my_history(query) if query.strip() else get_my_history(st.session_state.history_page)
         
-        if not my_chats: st.info("No logs found.")
+        if not my_chats: st.info("No matches found." if query.strip() else "No logs found.")
         else:
             for chat in my_chats:
                 # Main Chat Info Column, then Load Button, then Delete Button
                 c_info, c_load, c_del = st.columns([4, 0.8, 0.8])
                 try: dt = datetime.fromisoformat(chat["timestamp"]).strftime("%d %b, %H:%M") 
                 except: dt = "Unknown"
+                snippet = f'<br><span style="color:#aaa; font-size:0.85em">{chat["snippet"]}</span>' if chat.get("snippet") else ""
                 
                 with c_info:
                     st.markdown(f"""<div style="background:rgba(255,255,255,0.05); padding:15px; border-radius:10px; border:1px solid rgba(255,255,255,0.1);">
-                        <strong style="color:#00f3ff">{chat['title']}</strong><br><span style="color:#666; font-size:0.8em">{dt}</span></div>""", unsafe_allow_html=True)
+                        <strong style="color:#00f3ff">{chat['title']}</strong><br><span style="color:#666; font-size:0.8em">{dt}</span>{snippet}</div>""", unsafe_allow_html=True)
                 
                 with c_load:
                     st.write(""); st.write("") # Alignment
@@ -458,6 +502,18 @@ else:
                     if st.button("DEL", key=f"del_{chat['id']}"):
                         delete_chat_file(chat["filename"])
 
+            # PAGINATION (search results are a single ranked page)
+            if not query.strip():
+                c_prev, c_page, c_next = st.columns([0.8, 4, 0.8])
+                with c_prev:
+                    if st.button("◀ PREV", disabled=st.session_state.history_page == 0):
+                        st.session_state.history_page -= 1; st.rerun()
+                with c_page:
+                    st.markdown(f'<p style="text-align:center; color:#666;">PAGE {st.session_state.history_page + 1} / {pages} // {total} LOGS</p>', unsafe_allow_html=True)
+                with c_next:
+                    if st.button("NEXT ▶", disabled=st.session_state.history_page >= pages - 1):
+                        st.session_state.history_page += 1; st.rerun()
+
     elif st.session_state.page == "about":
         st.markdown('<div style="margin-top:20px;"></div>', unsafe_allow_html=True)
         st.title("ℹ️ SYSTEM INFORMATION")
@@ -467,8 +523,14 @@ else:
             st.markdown("""<div class="content-card">
                 <h3>Technical Architecture</h3>
                 <p><strong>KitKat AI v5.0</strong> is a high-performance neural interface.</p>
-                <ul><li><strong>Core:</strong> Gemini 1.5 Pro/Flash Hybrid</li><li><strong>Security:</strong> SHA-256 Auth & Local Encrypted JSON</li><li><strong>UI:</strong> Custom CSS Injection / Streamlit</li></ul>
+                <ul><li><strong>Core:</strong> Gemini 1.5 Pro/Flash Hybrid</li><li><strong>Security:</strong> Salted scrypt Auth & Local Encrypted JSON</li><li><strong>UI:</strong> Custom CSS Injection / Streamlit</li></ul>
             </div>""", unsafe_allow_html=True)
+            cs = get_response_cache().stats()
+            st.caption(f"RESPONSE CACHE // {cs['memory_hits']} MEM HITS · {cs['disk_hits']} DISK HITS · {cs['misses']} MISSES · "
+                       f"{cs['hit_rate']:.0%} HIT RATE · {cs['saved_seconds']:.1f}s SAVED")
+            ss = get_scheduler().stats()
+            st.caption(f"SCHEDULER // {ss['active']} ACTIVE · {ss['queue_depth']} QUEUED · "
+                       f"{ss['wait_avg'] * 1000:.0f}ms AVG WAIT · {ss['wait_max'] * 1000:.0f}ms MAX WAIT")
             
         with tab2:
             st.markdown("""<div class="content-card">
@@ -482,4 +544,30 @@ else:
                 <h2 style="color:#00f3ff;">Akshay Muley</h2>
                 <p><strong>Founder, Madhat Sec</strong></p>
                 <p>Building the future of secure AI interactions.</p>
-            </div>""", unsafe_allow_html=True)
\ No newline at end of file
+            </div>""", unsafe_allow_html=True)
+
+    elif st.session_state.page == "metrics" and is_admin:
+        st.markdown('<div style="margin-top:20px;"></div>', unsafe_allow_html=True)
+        st.title("📊 OPERATIONS")
+        get_metrics().flush()
+        spans, counters = summarize_jsonl(METRICS_FILE)
+        if not spans: st.info("No metrics recorded yet.")
+        else:
+            st.table([{"span": name, "count": v["count"], "p50 ms": round(v["p50"], 1), "p95 ms": round(v["p95"], 1),
+                       "p99 ms": round(v["p99"], 1), "max ms": round(v["max"], 1)} for name, v in sorted(spans.items())])
+        if counters: st.table([{"counter": k, "total": v} for k, v in sorted(counters.items())])
+        plugin_stats = get_plugin_manager().stats()
+        if plugin_stats:
+            st.table([{"command": c, "calls": t["calls"], "errors": t["errors"], "avg ms": round(t["total"] / max(t["calls"], 1) * 1000, 1),
+                       "max ms": round(t["max"] * 1000, 1)} for c, t in sorted(plugin_stats.items())])
+        for command, seconds in get_plugin_manager().stuck(): st.warning(f"/{command} has held a plugin worker for {seconds:.0f}s")
+        cs, ss = get_response_cache().stats(), get_scheduler().stats()
+        st.caption(f"CACHE // {cs['hit_rate']:.0%} HIT RATE · SCHEDULER // {ss['active']} ACTIVE · {ss['queue_depth']} QUEUED")
+        st.caption(f"Source: {METRICS_FILE.name} (rolling) // Prometheus: {METRICS_PROM_FILE}")
+
+# Only reached by runs that finish rendering; st.rerun() exits earlier.
+run_time = time.perf_counter() - RUN_STARTED
+if PROCESS["first_render"] is None:
+    PROCESS["first_render"] = run_time
+    get_metrics().observe("first_render", run_time)
+get_metrics().observe("script_rerun", run_time, page=st.session_state.page)
\ No newline at end of file
@@ -0,0 +1,39 @@
+"""Benchmark suite for the chat, storage, auth, plugin and streaming hot paths and cold start.
+
+    python -m bench [--quick] [--only storage,auth] [--out results.json]
+
+Runs without Streamlit or network against throwaway synthetic data
+directories and writes one machine-readable JSON document, so runs can be
+diffed across releases.
+"""
+import argparse, importlib, json, platform, subprocess, sys, time
+from datetime import datetime, timezone
+
+SUITES = ["storage", "auth", "plugins", "streaming", "passwords", "startup"]
+
+def git_revision():
+    try: return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except Exception: return None
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--quick", action="store_true", help="smaller sizes, for CI smoke runs")
+    ap.add_argument("--only", default="", help="comma-separated suites: " + ", ".join(SUITES))
+    ap.add_argument("--out", help="write JSON here instead of stdout")
+    args = ap.parse_args(argv)
+    suites = [s for s in args.only.split(",") if s] or SUITES
+    report = {"generated": datetime.now(timezone.utc).isoformat(), "revision": git_revision(),
+              "python": platform.python_version(), "platform": platform.platform(), "quick": args.quick, "suites": {}}
+    for name in suites:
+        started = time.perf_counter()
+        try: rows = importlib.import_module(f"bench.{name}").run(quick=args.quick)
+        except ImportError as e: rows = [{"name": name, "skipped": str(e)}]
+        report["suites"][name] = {"seconds": time.perf_counter() - started, "results": rows}
+        print(f"{name}: {len(rows)} results in {report['suites'][name]['seconds']:.1f}s", file=sys.stderr)
+    text = json.dumps(report, indent=2, default=str)
+    if args.out:
+        with open(args.out, "w") as f: f.write(text + "\n")
+    else: print(text)
+
+if __name__ == "__main__":
+    main()
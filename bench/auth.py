@@ -0,0 +1,40 @@
+"""Auth store operations, including concurrent writers against one store file."""
+import threading
+from bench.common import data_dir, result, timed
+from core.auth_store import JsonAuthStore, SqliteAuthStore
+
+def make_store(kind, d):
+    if kind == "sqlite": return lambda: SqliteAuthStore(d / "auth.db")
+    return lambda: JsonAuthStore(d / "users.json", d / "sessions.json")
+
+def bench_concurrent_logins(kind, writers, per_writer):
+    with data_dir() as d:
+        factory = make_store(kind, d)
+        stores = [factory() for _ in range(writers)] # one instance per "process"
+        tokens = []
+        def login(store):
+            for _ in range(per_writer): tokens.append(store.create_session("user0"))
+        def run():
+            threads = [threading.Thread(target=login, args=(s,)) for s in stores]
+            for t in threads: t.start()
+            for t in threads: t.join()
+        t, _ = timed(run)
+        check = factory()
+        lost = sum(1 for tok in tokens if check.session_user(tok) is None)
+        return result(f"auth.{kind}.concurrent_sessions", {"writers": writers, "per_writer": per_writer}, t,
+                      ops=writers * per_writer, lost_sessions=lost)
+
+def bench_lookup(kind, sessions):
+    with data_dir() as d:
+        store = make_store(kind, d)()
+        tokens = [store.create_session(f"user{i}") for i in range(sessions)]
+        t, _ = timed(lambda: [store.session_user(tok) for tok in tokens])
+        return result(f"auth.{kind}.session_lookup", {"sessions": sessions}, t, ops=sessions)
+
+def run(quick=False):
+    rows = []
+    for kind in ("json", "sqlite"):
+        for writers in ([2, 4] if quick else [2, 8, 16]):
+            rows.append(bench_concurrent_logins(kind, writers, 10 if quick else 25))
+        rows.append(bench_lookup(kind, 200 if quick else 2000))
+    return rows
@@ -0,0 +1,47 @@
+import json, random, string, tempfile, time
+from contextlib import contextmanager
+from pathlib import Path
+
+WORDS = ["neural", "proxy", "vault", "chain", "stream", "token", "cache", "python", "gemini", "latency",
+         "session", "render", "kernel", "socket", "packet", "cipher", "index", "query", "shard", "replay"]
+
+def timed(fn, *args, repeat=1, **kwargs):
+    """Best-of-`repeat` wall time in seconds and the last return value."""
+    best, result = None, None
+    for _ in range(repeat):
+        t = time.perf_counter(); result = fn(*args, **kwargs); elapsed = time.perf_counter() - t
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def sentence(rng, n=12):
+    return " ".join(rng.choice(WORDS) for _ in range(n)).capitalize() + "."
+
+def synthetic_messages(rng, turns, words=40):
+    msgs = []
+    for _ in range(turns):
+        msgs.append({"role": "user", "content": sentence(rng, words // 4)})
+        msgs.append({"role": "assistant", "content": " ".join(sentence(rng) for _ in range(words // 12 + 1))})
+    return msgs
+
+def write_legacy_chats(chats_dir, users, chats_per_user, turns=4, seed=7):
+    """Pretty-printed {id, username, title, timestamp, messages} files like the app has always written."""
+    rng = random.Random(seed)
+    chats_dir = Path(chats_dir); chats_dir.mkdir(parents=True, exist_ok=True)
+    for u in range(users):
+        for c in range(chats_per_user):
+            cid = f"{u:04d}-{c:05d}-" + "".join(rng.choice(string.hexdigits) for _ in range(8))
+            msgs = synthetic_messages(rng, turns)
+            data = {"id": cid, "username": f"user{u}", "title": msgs[0]["content"][:40], "timestamp": "2026-01-01T00:00:00", "messages": msgs}
+            with open(chats_dir / f"{cid}.json", "w") as f: json.dump(data, f, indent=4)
+
+@contextmanager
+def data_dir():
+    """A throwaway synthetic data/ directory."""
+    with tempfile.TemporaryDirectory(prefix="kai-bench-") as tmp:
+        yield Path(tmp)
+
+def result(name, params, seconds, ops=None, **extra):
+    row = {"name": name, "params": params, "seconds": seconds}
+    if ops: row["ops_per_sec"] = ops / seconds if seconds else None
+    row.update(extra)
+    return row
@@ -0,0 +1,47 @@
+"""Login latency per password-hashing cost setting.
+
+    python -m bench.passwords [--burst 8] [--rounds 5]
+
+Each setting is timed for a single verify and for a burst of concurrent
+verifies (simulating a login rush on one Streamlit worker). Prints JSON.
+"""
+import argparse, json, statistics, time
+from concurrent.futures import ThreadPoolExecutor
+from core.passwords import PasswordHasher
+
+SETTINGS = [
+    ("scrypt", {"n": 2 ** 13}),
+    ("scrypt", {"n": 2 ** 14}),
+    ("scrypt", {"n": 2 ** 15}),
+    ("pbkdf2_sha256", {"iterations": 200_000}),
+    ("pbkdf2_sha256", {"iterations": 600_000}),
+]
+
+def bench_setting(scheme, cost, rounds, burst):
+    hasher = PasswordHasher(scheme, **cost)
+    stored = hasher.hash("correct horse battery staple")
+    single = []
+    for _ in range(rounds):
+        t = time.perf_counter(); hasher.verify("correct horse battery staple", stored); single.append(time.perf_counter() - t)
+    with ThreadPoolExecutor(burst) as pool:
+        t = time.perf_counter()
+        list(pool.map(lambda _: hasher.verify("correct horse battery staple", stored), range(burst)))
+        burst_total = time.perf_counter() - t
+    return {"scheme": scheme, "cost": cost, "verify_ms_median": statistics.median(single) * 1000,
+            "verify_ms_max": max(single) * 1000, "burst": burst, "burst_total_ms": burst_total * 1000,
+            "logins_per_sec": burst / burst_total}
+
+def run(quick=False, rounds=5, burst=8):
+    settings = SETTINGS[:2] + SETTINGS[3:4] if quick else SETTINGS
+    rows = [bench_setting(s, c, 2 if quick else rounds, burst) for s, c in settings]
+    return [dict(r, name=f"passwords.{r['scheme']}", params=dict(r["cost"]), seconds=r["verify_ms_median"] / 1000) for r in rows]
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--rounds", type=int, default=5)
+    ap.add_argument("--burst", type=int, default=8)
+    args = ap.parse_args(argv)
+    print(json.dumps({"benchmark": "passwords", "results": run(rounds=args.rounds, burst=args.burst)}, indent=2))
+
+if __name__ == "__main__":
+    main()
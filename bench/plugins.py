@@ -0,0 +1,45 @@
+"""Plugin hot paths: chainlogger append/verify vs chain length, encryptor ops vs vault size."""
+import os
+from bench.common import data_dir, result, timed
+
+def bench_chain(quick):
+    from plugins import chainlogger
+    rows = []
+    for length in ([100, 1000] if quick else [100, 1000, 10000]):
+        with data_dir() as d:
+            config = {'CHAIN_FILE': d / "chain.jsonl"}
+            for i in range(length): chainlogger.log(config, f"entry {i}")
+            chainlogger._tails.clear() # measure a cold tail read too
+            t, _ = timed(chainlogger.log, config, "cold")
+            rows.append(result("chain.append_cold", {"length": length}, t))
+            t, _ = timed(lambda: [chainlogger.log(config, "x") for _ in range(100)])
+            rows.append(result("chain.append", {"length": length}, t, ops=100))
+            t, _ = timed(chainlogger.verify, config, "full")
+            rows.append(result("chain.verify_full", {"length": length}, t, ops=length))
+            t, _ = timed(chainlogger.verify, config, None)
+            rows.append(result("chain.verify_resume", {"length": length}, t))
+            t, _ = timed(chainlogger.view, config, f"{length // 2} {length // 2 + 20}")
+            rows.append(result("chain.view_range", {"length": length}, t))
+    return rows
+
+def bench_vault(quick):
+    try: from plugins import encryptor
+    except ImportError as e: return [result("vault", {}, 0.0, skipped=str(e))]
+    rows = []
+    for size in ([10, 100] if quick else [10, 100, 1000]):
+        with data_dir() as d:
+            config = {'VAULT_FILE': d / "vault.bin", 'ENCRYPTION_KEY': os.urandom(32).hex()}
+            for i in range(size): encryptor.write(config, f"note{i} :: " + "secret " * 50)
+            t, _ = timed(lambda: [encryptor.write(config, f"new{i} :: body") for i in range(20)])
+            rows.append(result("vault.write", {"notes": size}, t, ops=20))
+            t, _ = timed(lambda: [encryptor.read(config, f"note{i % size}") for i in range(20)])
+            rows.append(result("vault.read", {"notes": size}, t, ops=20))
+            encryptor._indexes.clear()
+            t, _ = timed(encryptor.list_notes, config)
+            rows.append(result("vault.list_cold", {"notes": size}, t))
+            t, _ = timed(encryptor.list_notes, config, repeat=5)
+            rows.append(result("vault.list_cached", {"notes": size}, t))
+    return rows
+
+def run(quick=False):
+    return bench_chain(quick) + bench_vault(quick)
@@ -0,0 +1,76 @@
+"""Cold-start profile: per-module import time and time to first render.
+
+    python -m bench.startup [--top 15]
+
+Each module is imported in a fresh interpreter under `python -X importtime`
+so costs are not hidden by modules an earlier import already loaded. First
+render runs app.py through Streamlit's AppTest harness when Streamlit is
+installed. Prints JSON.
+"""
+import argparse, ast, json, os, subprocess, sys, time
+from pathlib import Path
+from bench.common import result
+
+ROOT = Path(__file__).resolve().parent.parent
+# Imports app.py defers until first use, profiled to show what the deferral saves
+DEFERRED = ["dotenv", "google.generativeai"]
+
+def app_imports():
+    """Non-stdlib modules app.py imports at module level, in source order, so the list tracks the app."""
+    modules = []
+    for node in ast.parse((ROOT / "app.py").read_text(encoding="utf-8")).body:
+        if isinstance(node, ast.Import): names = [a.name for a in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level: names = [node.module]
+        else: continue
+        modules += [n for n in names if n.split(".")[0] not in sys.stdlib_module_names and n not in modules]
+    return modules
+
+MODULES = app_imports() + DEFERRED
+
+def import_profile(module, top=10):
+    """Wall time of a fresh `import module` and the slowest packages under it (cumulative us)."""
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True, cwd=ROOT, env=dict(os.environ, PYTHONPATH=str(ROOT)))
+    wall = time.perf_counter() - started
+    if proc.returncode:
+        return None, wall, proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "import failed"
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line: continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if name.strip() == "site": rows = []; continue # interpreter startup, not our import
+        rows.append((int(cumulative), name[1:].rstrip()))
+    total = sum(c for c, n in rows if not n.startswith(" "))
+    # Nesting is two spaces per level; list the module and its first two levels
+    heaviest = sorted((c, n.strip()) for c, n in rows if len(n) - len(n.lstrip()) <= 4)[::-1][:top]
+    return total, wall, [{"module": n, "ms": c / 1000} for c, n in heaviest]
+
+def first_render():
+    """(first run, warm rerun) seconds for app.py, or a skip reason."""
+    try: from streamlit.testing.v1 import AppTest
+    except ImportError as e: return None, None, str(e)
+    app = AppTest.from_file(str(ROOT / "app.py"), default_timeout=60)
+    t = time.perf_counter(); app.run(); cold = time.perf_counter() - t
+    t = time.perf_counter(); app.run(); warm = time.perf_counter() - t
+    return cold, warm, None
+
+def run(quick=False, top=10):
+    rows = []
+    for module in (["streamlit"] + DEFERRED + ["core.models"] if quick else MODULES):
+        total, wall, detail = import_profile(module, top)
+        if total is None: rows.append(result(f"import.{module}", {}, wall, skipped=detail)); continue
+        rows.append(result(f"import.{module}", {}, total / 1e6, interpreter_ms=wall * 1000, heaviest=detail))
+    cold, warm, skipped = first_render()
+    if skipped: rows.append(result("first_render", {}, 0.0, skipped=skipped))
+    else: rows.append(result("first_render", {}, cold, rerun_seconds=warm))
+    return rows
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--top", type=int, default=15, help="heaviest packages listed per module")
+    args = ap.parse_args(argv)
+    print(json.dumps(run(top=args.top), indent=2))
+
+if __name__ == "__main__":
+    main()
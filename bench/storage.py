@@ -0,0 +1,47 @@
+"""Chat storage hot paths: the Logs page lookup and per-turn chat saves."""
+import json, os, random
+from bench.common import data_dir, result, synthetic_messages, timed, write_legacy_chats
+from core.catalog import ChatCatalog
+from core.chatlog import ChatStore
+
+def legacy_history(chats_dir, username):
+    """What get_my_history() did before the catalog: glob, sort by mtime, parse everything."""
+    my_chats = []
+    files = list(chats_dir.glob("*.json"))
+    files.sort(key=os.path.getmtime, reverse=True)
+    for f in files:
+        with open(f, "r") as file: data = json.load(file)
+        if data.get("username") == username:
+            my_chats.append({"filename": f.name, "title": data.get("title"), "timestamp": data.get("timestamp"), "id": data.get("id")})
+    return my_chats
+
+def bench_history(quick):
+    rows = []
+    for users, chats in ([(5, 20), (20, 50)] if quick else [(10, 50), (50, 100), (100, 200)]):
+        with data_dir() as d:
+            chats_dir = d / "chats"
+            write_legacy_chats(chats_dir, users, chats)
+            params = {"users": users, "chats_per_user": chats}
+            t, _ = timed(legacy_history, chats_dir, "user0")
+            rows.append(result("history.legacy_scan", params, t))
+            t, catalog = timed(ChatCatalog, d / "catalog.db", chats_dir)
+            rows.append(result("history.catalog_rebuild", params, t))
+            t, page = timed(catalog.page, "user0", 0, 20, repeat=5)
+            rows.append(result("history.catalog_page", params, t, rows=len(page)))
+    return rows
+
+def bench_save(quick):
+    rows, rng = [], random.Random(3)
+    for turns in ([10, 50] if quick else [10, 50, 200, 500]):
+        msgs = synthetic_messages(rng, turns)
+        for mode in ("json", "log"):
+            with data_dir() as d:
+                store = ChatStore(d, mode=mode)
+                def run():
+                    for i in range(2, len(msgs) + 1, 2): store.save("chat", "user0", "title", msgs[:i])
+                t, _ = timed(run)
+                rows.append(result(f"save.{mode}", {"turns": turns}, t, ops=turns, per_turn_ms=t / turns * 1000))
+    return rows
+
+def run(quick=False):
+    return bench_history(quick) + bench_save(quick)
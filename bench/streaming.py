@@ -0,0 +1,69 @@
+"""The chat engine behind stream_ai_response (cache -> quota -> scheduler -> model pool ->
+usage/metrics) plus frame coalescing, against the deterministic local model backend."""
+import threading, time
+from bench.common import data_dir, result
+from core.backends import LocalBackend
+from core.cache import ResponseCache
+from core.engine import ChatEngine
+from core.metrics import Metrics
+from core.models import ModelPool
+from core.render import coalesce
+from core.scheduler import Scheduler
+from core.usage import UsageMeter
+
+CHUNK_TOKENS = 4
+
+def local_backend(chunks, delay, ttft=0.0):
+    """`chunks` chunks `delay` seconds apart (as fast as possible for 0)."""
+    return LocalBackend(ttft=ttft, tokens_per_sec=CHUNK_TOKENS / delay if delay else None,
+                        response_tokens=chunks * CHUNK_TOKENS, chunk_tokens=CHUNK_TOKENS)
+
+def engine(chunks, delay, tmp):
+    """A ChatEngine wired like app.py's, with throwaway usage/metrics files."""
+    return ChatEngine(ModelPool(["fake"], local_backend(chunks, delay)), Scheduler(max_concurrent=4), ResponseCache(None),
+                      UsageMeter(tmp / "usage.json", flush_interval=0), Metrics(tmp / "metrics.jsonl", flush_interval=0), ["fake"])
+
+def pipeline(engine, user, prompt, interval=0.05):
+    """stream_ai_response + the home page render loop. Returns (ttft, frames, chars)."""
+    started, ttft, frames, parts = time.perf_counter(), None, 0, []
+    for batch in coalesce(engine.stream(user, f"session-{user}", prompt), interval):
+        if ttft is None: ttft = time.perf_counter() - started
+        parts.extend(batch); frames += 1
+        "".join(parts) # what the placeholder re-render costs per frame
+    return ttft, frames, len("".join(parts))
+
+def run(quick=False):
+    rows = []
+    for chunks, delay in ([(200, 0.0), (100, 0.002)] if quick else [(200, 0.0), (2000, 0.0), (200, 0.002), (500, 0.005)]):
+        with data_dir() as tmp:
+            chat = engine(chunks, delay, tmp)
+            params = {"chunks": chunks, "chunk_delay": delay}
+            t = time.perf_counter(); ttft, frames, chars = pipeline(chat, "user0", "hello"); t = time.perf_counter() - t
+            rows.append(result("stream.miss", params, t, ops=chunks, ttft_ms=ttft * 1000, frames=frames,
+                               legacy_frames=chars, chars=chars))
+            t = time.perf_counter(); ttft, frames, _ = pipeline(chat, "user0", "hello"); t = time.perf_counter() - t
+            rows.append(result("stream.cache_hit", params, t, ttft_ms=ttft * 1000, frames=frames))
+            # Concurrent users sharing the scheduler, distinct prompts so nothing is cached
+            users = 4 if quick else 16
+            waits = []
+            def user(i): waits.append(pipeline(chat, f"user{i}", f"prompt {i}")[0])
+            t = time.perf_counter()
+            threads = [threading.Thread(target=user, args=(i,)) for i in range(users)]
+            for th in threads: th.start()
+            for th in threads: th.join()
+            t = time.perf_counter() - t
+            rows.append(result("stream.concurrent", dict(params, users=users, max_concurrent=4), t, ops=users * chunks,
+                               ttft_ms_max=max(waits) * 1000, scheduler=chat.scheduler.stats(),
+                               tokens_recorded=sum(d["response_tokens"] for u in range(users) for d in chat.usage.user_days(f"user{u}", 1))))
+    rows.append(bench_cancel())
+    return rows
+
+def bench_cancel(ttft=2.0):
+    """How long a request cancelled while waiting for its first token keeps a scheduler slot."""
+    pool, scheduler = ModelPool(["fake"], local_backend(10, 0.0, ttft)), Scheduler(max_concurrent=1)
+    ticket = scheduler.submit("user0", pool.stream, [{"role": "user", "parts": ["hello"]}], cancellable=True)
+    while not scheduler.stats()["active"]: time.sleep(0.001)
+    time.sleep(0.05)
+    t = time.perf_counter(); ticket.cancel()
+    while scheduler.stats()["active"]: time.sleep(0.001)
+    return result("stream.cancel", {"ttft": ttft}, time.perf_counter() - t)
@@ -0,0 +1,185 @@
+"""Bulk chat export/import and retention for data/chats.
+
+    python -m core.archive export <dest> [--data data] [--shard-size 5000]
+    python -m core.archive import <src> [--data data] [--overwrite]
+    python -m core.archive retain --days 365 [--archive <dest>] [--data data] [--dry-run]
+
+Archives are gzip JSONL shards, one chat per line, partitioned as
+<dest>/<user>/<YYYY-MM>/part-NNNN.jsonl.gz. Every command streams: chats are
+read one at a time from a directory scan and shards are read line by line,
+so memory stays flat however many chats there are. Stop the app (or expect
+its catalog/search pages to lag until restart) before importing.
+"""
+import argparse, gzip, json, os, re, sys, time
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from core.chatlog import read_chat, write_chat
+
+def iter_chat_ids(chats_dir):
+    """(chat_id, mtime) for every chat on disk, via one directory scan."""
+    with os.scandir(chats_dir) as it:
+        for entry in it:
+            name = entry.name
+            if name.endswith(".json"): chat_id, other = name[:-5], name + "l"
+            elif name.endswith(".jsonl"): chat_id, other = name[:-6], name[:-1]
+            else: continue
+            try: mtime = entry.stat().st_mtime
+            except FileNotFoundError: continue
+            sibling = os.path.join(chats_dir, other)
+            if os.path.exists(sibling):
+                if name.endswith(".jsonl"): continue # reported once, from the .json side
+                try: mtime = max(mtime, os.path.getmtime(sibling))
+                except FileNotFoundError: pass
+            yield chat_id, mtime
+
+def iter_chats(chats_dir):
+    """(chat dict, mtime) for every readable chat; unreadable files are skipped."""
+    for chat_id, mtime in iter_chat_ids(chats_dir):
+        try: yield read_chat(chats_dir, chat_id), mtime
+        except (OSError, ValueError): continue
+
+def partition(chat, mtime):
+    month = (chat.get("timestamp") or "")[:7]
+    if not re.fullmatch(r"\d{4}-\d{2}", month): month = datetime.fromtimestamp(mtime).strftime("%Y-%m")
+    return chat.get("username") or "_unknown", month
+
+def safe_name(username):
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", username).lstrip(".") or "_"
+
+class ShardWriter:
+    """Appends chats to gzip JSONL shards, rolling to a new part every `shard_size`
+    chats. At most `max_open` shards are open at once; a partition whose shard was
+    closed continues in a new part, so existing archives are never rewritten."""
+
+    def __init__(self, dest, shard_size=5000, max_open=32):
+        self.dest = Path(dest)
+        self.shard_size = shard_size
+        self.max_open = max_open
+        self.open = OrderedDict() # (user, month) -> [file, chats written]
+        self.shards = 0
+        self.chats = 0
+
+    def write(self, chat, mtime):
+        key = partition(chat, mtime)
+        shard = self.open.pop(key, None)
+        if shard is None or shard[1] >= self.shard_size:
+            if shard: shard[0].close()
+            shard = [self._new_shard(*key), 0]
+            while len(self.open) >= self.max_open: self.open.popitem(last=False)[1][0].close()
+        self.open[key] = shard
+        shard[0].write(json.dumps(chat, separators=(",", ":")) + "\n")
+        shard[1] += 1; self.chats += 1
+
+    def close(self):
+        while self.open: self.open.popitem()[1][0].close()
+
+    def _new_shard(self, user, month):
+        folder = self.dest / safe_name(user) / month
+        folder.mkdir(parents=True, exist_ok=True)
+        part = 0
+        while (folder / f"part-{part:04d}.jsonl.gz").exists(): part += 1
+        self.shards += 1
+        return gzip.open(folder / f"part-{part:04d}.jsonl.gz", "wt", encoding="utf-8")
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): self.close()
+
+def iter_archive(src):
+    """Chats from every shard under `src`, streamed line by line."""
+    for shard in sorted(Path(src).rglob("*.jsonl.gz")):
+        with gzip.open(shard, "rt", encoding="utf-8") as f:
+            for line in f:
+                try: yield json.loads(line)
+                except ValueError: continue # truncated tail of an interrupted export
+
+def export_chats(chats_dir, dest, shard_size=5000):
+    """Write every chat to shards under `dest`. Returns (chats, shards)."""
+    with ShardWriter(dest, shard_size) as w:
+        for chat, mtime in iter_chats(chats_dir): w.write(chat, mtime)
+    return w.chats, w.shards
+
+def chat_time(chat, default=None):
+    try: return datetime.fromisoformat(chat.get("timestamp") or "").timestamp()
+    except ValueError: return default
+
+def import_chats(src, chats_dir, catalog=None, search=None, overwrite=False):
+    """Restore chats from shards into `chats_dir`, keeping the catalog and search
+    index in step when given. Returns (imported, skipped)."""
+    chats_dir = Path(chats_dir); chats_dir.mkdir(parents=True, exist_ok=True)
+    imported = skipped = 0
+    for chat in iter_archive(src):
+        chat_id = chat.get("id")
+        if not chat_id or not re.fullmatch(r"[A-Za-z0-9_-]+", chat_id): skipped += 1; continue
+        if not overwrite and ((chats_dir / f"{chat_id}.json").exists() or (chats_dir / f"{chat_id}.jsonl").exists()):
+            skipped += 1; continue
+        write_chat(chats_dir, chat)
+        updated = chat_time(chat, time.time())
+        os.utime(chats_dir / f"{chat_id}.json", (updated, updated))
+        if catalog: catalog.upsert(chat_id, chat.get("username") or "", f"{chat_id}.json", chat.get("title", "Untitled"), chat.get("timestamp", ""), updated)
+        if search: search.remove(chat_id); search.add(chat_id, chat.get("username"), chat.get("messages", []))
+        imported += 1
+    return imported, skipped
+
+def apply_retention(chats_dir, days, archive=None, catalog=None, search=None, dry_run=False, batch=1000):
+    """Delete (after archiving to `archive`, if given) every chat not updated in
+    `days` days, in one directory pass. Returns the number of chats expired."""
+    chats_dir = Path(chats_dir)
+    cutoff = time.time() - days * 86400
+    expired, pending = 0, []
+    writer = ShardWriter(archive) if archive and not dry_run else None
+
+    def drop():
+        if writer: writer.close() # chats are deleted only once their shards are on disk
+        for chat_id in pending:
+            for p in (chats_dir / f"{chat_id}.json", chats_dir / f"{chat_id}.jsonl"):
+                if p.exists(): os.remove(p)
+            if catalog: catalog.remove(chat_id)
+            if search: search.remove(chat_id)
+        pending.clear()
+
+    for chat_id, mtime in iter_chat_ids(chats_dir):
+        if mtime >= cutoff: continue
+        if writer:
+            try: writer.write(read_chat(chats_dir, chat_id), mtime)
+            except (OSError, ValueError): continue # keep what could not be archived
+        expired += 1
+        if dry_run: continue
+        pending.append(chat_id)
+        if len(pending) >= batch: drop()
+    drop()
+    return expired
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--data", default="data", help="the app's data directory (default: ./data)")
+    sub = ap.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("export", help="write every chat to gzip JSONL shards")
+    p.add_argument("dest"); p.add_argument("--shard-size", type=int, default=5000)
+    p = sub.add_parser("import", help="restore chats from shards")
+    p.add_argument("src"); p.add_argument("--overwrite", action="store_true", help="replace chats that already exist")
+    p = sub.add_parser("retain", help="delete chats older than --days, optionally archiving them first")
+    p.add_argument("--days", type=int, required=True); p.add_argument("--archive")
+    p.add_argument("--dry-run", action="store_true", help="only count what would expire")
+    args = ap.parse_args(argv)
+    data = Path(args.data); chats_dir = data / "chats"
+    started = time.perf_counter()
+    if args.command == "export":
+        chats, shards = export_chats(chats_dir, args.dest, args.shard_size)
+        summary = f"exported {chats} chats into {shards} shards"
+    else:
+        # Indexes are kept in step only if the app has created them; otherwise it rebuilds them on start.
+        from core.catalog import ChatCatalog
+        from core.search import ChatSearchIndex
+        catalog = ChatCatalog(data / "catalog.db", chats_dir) if (data / "catalog.db").exists() else None
+        search = ChatSearchIndex(data / "search.db", chats_dir) if (data / "search.db").exists() else None
+        if args.command == "import":
+            imported, skipped = import_chats(args.src, chats_dir, catalog, search, args.overwrite)
+            summary = f"imported {imported} chats, skipped {skipped}"
+        else:
+            expired = apply_retention(chats_dir, args.days, args.archive, catalog, search, args.dry_run)
+            summary = f"{'would expire' if args.dry_run else 'expired'} {expired} chats" + (f" (archived to {args.archive})" if args.archive and not args.dry_run else "")
+    print(f"{summary} in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+import json, os, sqlite3, threading, time, uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError: # Windows: fall back to in-process locking only
+    fcntl = None
+
+SESSION_TTL = 30 * 86400
+
+class AuthStore:
+    """Users (username -> password hash) and login sessions (token -> username, expiry)."""
+
+    def __init__(self, session_ttl=SESSION_TTL, clock=time.time):
+        self.session_ttl = session_ttl
+        self.clock = clock
+
+    def new_token(self): return str(uuid.uuid4())
+
+    def get_user(self, username): raise NotImplementedError
+    def add_user(self, username, password_hash): raise NotImplementedError
+    def set_password(self, username, password_hash): raise NotImplementedError
+    def create_session(self, username): raise NotImplementedError
+    def session_user(self, token): raise NotImplementedError
+    def delete_session(self, token): raise NotImplementedError
+    def purge_expired(self): raise NotImplementedError
+
+class JsonAuthStore(AuthStore):
+    """users.json / sessions.json kept in memory.
+
+    Lookups never touch the disk unless they miss and the file changed underneath
+    us (another process). Writes take an exclusive file lock, merge any external
+    change, and replace the file atomically. Legacy `{token: username}` sessions
+    are read as fresh sessions.
+    """
+
+    def __init__(self, users_file, sessions_file, session_ttl=SESSION_TTL, clock=time.time):
+        super().__init__(session_ttl, clock)
+        self.users_file = Path(users_file)
+        self.sessions_file = Path(sessions_file)
+        self.lock = threading.RLock()
+        self.users, self.users_mtime = {}, None
+        self.sessions, self.sessions_mtime = {}, None
+        self._reload_users(); self._reload_sessions()
+
+    def get_user(self, username):
+        with self.lock:
+            if username not in self.users: self._reload_users()
+            return self.users.get(username)
+
+    def add_user(self, username, password_hash):
+        with self._writing(self.users_file):
+            self._reload_users()
+            if username in self.users: return False
+            self.users[username] = password_hash
+            self.users_mtime = _write_json(self.users_file, self.users, indent=4)
+            return True
+
+    def set_password(self, username, password_hash):
+        with self._writing(self.users_file):
+            self._reload_users()
+            self.users[username] = password_hash
+            self.users_mtime = _write_json(self.users_file, self.users, indent=4)
+
+    def create_session(self, username):
+        token = self.new_token()
+        with self._writing(self.sessions_file):
+            self._reload_sessions()
+            now = self.clock()
+            self.sessions = {t: s for t, s in self.sessions.items() if s["expires"] > now}
+            self.sessions[token] = {"user": username, "expires": now + self.session_ttl}
+            self.sessions_mtime = _write_json(self.sessions_file, self.sessions)
+        return token
+
+    def session_user(self, token):
+        with self.lock:
+            s = self.sessions.get(token)
+            if s is None:
+                self._reload_sessions(); s = self.sessions.get(token)
+            if s is None or s["expires"] <= self.clock(): return None
+            return s["user"]
+
+    def delete_session(self, token):
+        with self._writing(self.sessions_file):
+            self._reload_sessions()
+            if self.sessions.pop(token, None) is not None:
+                self.sessions_mtime = _write_json(self.sessions_file, self.sessions)
+
+    def purge_expired(self):
+        with self._writing(self.sessions_file):
+            self._reload_sessions()
+            now = self.clock()
+            live = {t: s for t, s in self.sessions.items() if s["expires"] > now}
+            purged = len(self.sessions) - len(live)
+            if purged:
+                self.sessions = live
+                self.sessions_mtime = _write_json(self.sessions_file, live)
+            return purged
+
+    @contextmanager
+    def _writing(self, path):
+        with self.lock:
+            if fcntl is None:
+                yield; return
+            with open(path.with_suffix(path.suffix + ".lock"), "w") as lf:
+                fcntl.flock(lf, fcntl.LOCK_EX)
+                try: yield
+                finally: fcntl.flock(lf, fcntl.LOCK_UN)
+
+    def _reload_users(self):
+        mtime, data = _read_json(self.users_file, self.users_mtime)
+        if data is not None: self.users, self.users_mtime = data, mtime
+
+    def _reload_sessions(self):
+        mtime, data = _read_json(self.sessions_file, self.sessions_mtime)
+        if data is None: return
+        now = self.clock()
+        self.sessions = {t: s if isinstance(s, dict) else {"user": s, "expires": now + self.session_ttl}
+                         for t, s in data.items()}
+        self.sessions_mtime = mtime
+
+class SqliteAuthStore(AuthStore):
+    """Same contract backed by one SQLite file with an index on session expiry.
+
+    Expired sessions are purged whenever a session is created. When the database
+    is first created, users and live sessions are imported from the JSON store's
+    `users_file` / `sessions_file` if given, so switching backends keeps accounts.
+    """
+
+    def __init__(self, db_path, session_ttl=SESSION_TTL, clock=time.time, users_file=None, sessions_file=None):
+        super().__init__(session_ttl, clock)
+        self.lock = threading.Lock()
+        created = not Path(db_path).exists()
+        self.conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS users (username TEXT PRIMARY KEY, hash TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS sessions (token TEXT PRIMARY KEY, username TEXT NOT NULL, expires REAL NOT NULL);
+            CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions(expires);
+        """)
+        if created and (users_file or sessions_file): self._import_json(users_file, sessions_file)
+
+    def get_user(self, username):
+        with self.lock:
+            row = self.conn.execute("SELECT hash FROM users WHERE username = ?", (username,)).fetchone()
+        return row[0] if row else None
+
+    def add_user(self, username, password_hash):
+        with self.lock, self.conn:
+            return self.conn.execute("INSERT OR IGNORE INTO users VALUES (?, ?)", (username, password_hash)).rowcount == 1
+
+    def set_password(self, username, password_hash):
+        with self.lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO users VALUES (?, ?)", (username, password_hash))
+
+    def create_session(self, username):
+        token = self.new_token()
+        now = self.clock()
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM sessions WHERE expires <= ?", (now,)) # cheap via idx_sessions_expires
+            self.conn.execute("INSERT INTO sessions VALUES (?, ?, ?)", (token, username, now + self.session_ttl))
+        return token
+
+    def session_user(self, token):
+        with self.lock:
+            row = self.conn.execute("SELECT username FROM sessions WHERE token = ? AND expires > ?", (token, self.clock())).fetchone()
+        return row[0] if row else None
+
+    def delete_session(self, token):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM sessions WHERE token = ?", (token,))
+
+    def purge_expired(self):
+        with self.lock, self.conn:
+            return self.conn.execute("DELETE FROM sessions WHERE expires <= ?", (self.clock(),)).rowcount
+
+    def _import_json(self, users_file, sessions_file):
+        users = (_read_json(users_file, None)[1] or {}) if users_file else {}
+        sessions = (_read_json(sessions_file, None)[1] or {}) if sessions_file else {}
+        now = self.clock()
+        rows = [(t, s["user"], s["expires"]) if isinstance(s, dict) else (t, s, now + self.session_ttl) for t, s in sessions.items()]
+        with self.lock, self.conn:
+            self.conn.executemany("INSERT OR IGNORE INTO users VALUES (?, ?)", users.items())
+            self.conn.executemany("INSERT OR IGNORE INTO sessions VALUES (?, ?, ?)", [r for r in rows if r[2] > now])
+
+def _read_json(path, known_mtime):
+    """Return (mtime, data) if the file changed since `known_mtime`, else (known_mtime, None)."""
+    try: mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError: return known_mtime, ({} if known_mtime is None else None)
+    if mtime == known_mtime: return known_mtime, None
+    try:
+        with open(path, "r") as f: return mtime, json.load(f)
+    except ValueError: return known_mtime, None
+
+def _write_json(path, data, indent=None):
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=indent)
+        f.flush(); os.fsync(f.fileno())
+    os.replace(tmp, path)
+    return os.stat(path).st_mtime_ns
@@ -0,0 +1,116 @@
+import hashlib, json, random, threading, time
+from core.context import estimate_tokens
+
+class Usage:
+    """Token counts in the shape of Gemini's usage_metadata."""
+
+    def __init__(self, prompt_token_count, candidates_token_count):
+        self.prompt_token_count = prompt_token_count
+        self.candidates_token_count = candidates_token_count
+        self.total_token_count = prompt_token_count + candidates_token_count
+
+class Chunk:
+    def __init__(self, text, usage_metadata=None):
+        self.text = text
+        self.usage_metadata = usage_metadata
+
+def contents_text(contents):
+    """Flatten a prompt string or a list of {"role", "parts"} contents to text."""
+    if isinstance(contents, str): return contents
+    return "\n".join(str(p) for c in contents for p in (c.get("parts", []) if isinstance(c, dict) else [c]))
+
+class ModelBackend:
+    """A source of streamed completions that ModelPool can drive.
+
+    `stream(model, contents, cancel)` yields chunks with `.text`; the last one
+    carries `.usage_metadata` (prompt_token_count, candidates_token_count) when
+    the backend reports usage. Generation stops early when `cancel` (a
+    threading.Event) is set or the generator is closed. `health_check(model)`
+    raises when the model cannot serve requests.
+    """
+
+    def stream(self, model, contents, cancel=None):
+        raise NotImplementedError
+
+    def health_check(self, model):
+        pass
+
+class GeminiBackend(ModelBackend):
+    """google.generativeai, imported and configured on first use and shared by every prompt."""
+
+    def __init__(self, api_key):
+        self.api_key = api_key
+        self.lock = threading.Lock()
+        self.genai = None
+        self.models = {}
+
+    def model(self, name):
+        with self.lock:
+            if self.genai is None:
+                import google.generativeai as genai
+                genai.configure(api_key=self.api_key)
+                self.genai = genai
+            if name not in self.models: self.models[name] = self.genai.GenerativeModel(name)
+            return self.models[name]
+
+    def health_check(self, model):
+        self.model(model).count_tokens("ping") # cheap round trip that actually hits the API
+
+    def stream(self, model, contents, cancel=None):
+        for chunk in self.model(model).generate_content(contents, stream=True):
+            if cancel is not None and cancel.is_set(): return
+            yield chunk # already carries .text and .usage_metadata
+
+class LocalBackend(ModelBackend):
+    """Deterministic offline model for load tests and development without network.
+
+    Replays the canned response for a prompt (`responses` maps the last user
+    message to text, or name a JSON file of that mapping) or synthesizes
+    `response_tokens` words seeded by the prompt, so the same prompt always gets
+    the same answer. The first chunk arrives after `ttft` seconds and the rest at
+    `tokens_per_sec` (None streams as fast as possible), `chunk_tokens` words per
+    chunk. Models listed in `unhealthy` fail their health check.
+    """
+
+    WORDS = ["signal", "kernel", "vector", "cache", "stream", "latency", "packet", "cipher", "neural", "proxy",
+             "token", "shard", "index", "socket", "queue", "thread", "buffer", "router", "entropy", "matrix"]
+
+    def __init__(self, responses=None, ttft=0.3, tokens_per_sec=40.0, response_tokens=120, chunk_tokens=4,
+                 unhealthy=(), sleep=time.sleep, clock=time.monotonic):
+        if isinstance(responses, str):
+            with open(responses) as f: responses = json.load(f)
+        self.responses = responses or {}
+        self.ttft = ttft
+        self.tokens_per_sec = tokens_per_sec
+        self.response_tokens = response_tokens
+        self.chunk_tokens = chunk_tokens
+        self.unhealthy = set(unhealthy)
+        self.sleep, self.clock = sleep, clock
+
+    def health_check(self, model):
+        if model in self.unhealthy: raise ConnectionError(f"{model} is marked unhealthy")
+
+    def respond(self, contents):
+        last = contents if isinstance(contents, str) else contents_text(contents[-1:])
+        if last in self.responses: return self.responses[last]
+        rng = random.Random(hashlib.sha256(contents_text(contents).encode()).digest())
+        words = [rng.choice(self.WORDS) for _ in range(self.response_tokens)]
+        return " ".join(words).capitalize() + "."
+
+    def stream(self, model, contents, cancel=None):
+        words = self.respond(contents).split(" ")
+        prompt_tokens = estimate_tokens(contents_text(contents))
+        due = self.clock() + self.ttft
+        step = self.chunk_tokens / self.tokens_per_sec if self.tokens_per_sec else 0.0
+        for i in range(0, len(words), self.chunk_tokens):
+            if not self._wait(due, cancel): return
+            done = i + self.chunk_tokens >= len(words)
+            piece = " ".join(words[i:i + self.chunk_tokens]) + ("" if done else " ")
+            yield Chunk(piece, Usage(prompt_tokens, len(words)) if done else None)
+            due += step # absolute schedule, so slow consumers do not stretch the rate
+
+    def _wait(self, due, cancel):
+        delay = due - self.clock()
+        if cancel is not None: return not cancel.wait(max(0.0, delay))
+        if delay > 0: self.sleep(delay)
+        return True
@@ -0,0 +1,114 @@
+import hashlib, json, sqlite3, threading, time
+from collections import OrderedDict
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    chunks TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    elapsed REAL,
+    expires REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_used ON responses(last_used);
+"""
+
+def normalize_prompt(prompt):
+    return " ".join(prompt.lower().split())
+
+def cache_key(prompt, model, context=()):
+    """Normalized prompt + model + hash of the conversation context."""
+    raw = json.dumps([normalize_prompt(prompt), model, context], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+class ResponseCache:
+    """Two-tier cache of streamed responses: an in-memory LRU in front of a SQLite file.
+
+    Entries are stored as the list of chunks the model produced so a hit can be
+    replayed through the same streaming path. Both tiers honour `ttl`; the disk
+    tier evicts least recently used rows once it grows past `max_disk_bytes`.
+    """
+
+    def __init__(self, db_path=None, max_items=256, ttl=86400.0, max_disk_bytes=50 * 1024 * 1024, clock=time.time):
+        self.max_items = max_items
+        self.ttl = ttl
+        self.max_disk_bytes = max_disk_bytes
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.memory = OrderedDict() # key -> (expires, chunks, elapsed)
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0, "saved_seconds": 0.0}
+        self.conn = None
+        if db_path:
+            self.conn = sqlite3.connect(str(db_path), check_same_thread=False)
+            self.conn.executescript(SCHEMA)
+
+    def get(self, key):
+        now = self.clock()
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry and entry[0] > now:
+                self.memory.move_to_end(key)
+                return self._hit("memory_hits", entry)
+            if entry: del self.memory[key]
+            if self.conn:
+                row = self.conn.execute("SELECT expires, chunks, elapsed FROM responses WHERE key = ?", (key,)).fetchone()
+                if row and row[0] > now:
+                    with self.conn: self.conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+                    entry = (row[0], json.loads(row[1]), row[2] or 0.0)
+                    self._remember(key, entry)
+                    return self._hit("disk_hits", entry)
+                if row:
+                    with self.conn: self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self.counters["misses"] += 1
+            return None
+
+    def put(self, key, chunks, elapsed=0.0):
+        """Store a finished response; `elapsed` is how long the model took, credited on every hit."""
+        now = self.clock()
+        entry = (now + self.ttl, list(chunks), elapsed)
+        with self.lock:
+            self._remember(key, entry)
+            self.counters["stores"] += 1
+            if self.conn:
+                blob = json.dumps(entry[1])
+                with self.conn:
+                    self.conn.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)", (key, blob, len(blob), elapsed, entry[0], now))
+                self._evict_disk(now)
+
+    def stats(self):
+        with self.lock:
+            stats = dict(self.counters, memory_items=len(self.memory))
+            if self.conn:
+                stats["disk_items"], stats["disk_bytes"] = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        with self.lock:
+            self.memory.clear()
+            if self.conn:
+                with self.conn: self.conn.execute("DELETE FROM responses")
+
+    def _hit(self, counter, entry):
+        self.counters[counter] += 1
+        self.counters["saved_seconds"] += entry[2]
+        return list(entry[1])
+
+    def _remember(self, key, entry):
+        self.memory[key] = entry
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_items:
+            self.memory.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def _evict_disk(self, now):
+        with self.conn:
+            self.conn.execute("DELETE FROM responses WHERE expires <= ?", (now,))
+            total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total <= self.max_disk_bytes: return
+            for key, size in self.conn.execute("SELECT key, size FROM responses ORDER BY last_used").fetchall():
+                self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.counters["evictions"] += 1
+                total -= size
+                if total <= self.max_disk_bytes: break
@@ -0,0 +1,72 @@
+import os, sqlite3, threading, time
+from pathlib import Path
+from core.chatlog import read_chat
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chats (
+    id TEXT PRIMARY KEY,
+    username TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    title TEXT,
+    timestamp TEXT,
+    updated REAL
+);
+CREATE INDEX IF NOT EXISTS idx_chats_user ON chats(username, updated DESC);
+"""
+
+class ChatCatalog:
+    """Persistent per-user index of chat metadata, kept in sync by the chat store."""
+
+    def __init__(self, db_path, chats_dir):
+        self.db_path = Path(db_path)
+        self.chats_dir = Path(chats_dir)
+        self.lock = threading.Lock()
+        fresh = not self.db_path.exists()
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        if fresh: self.rebuild()
+
+    def upsert(self, chat_id, username, filename, title, timestamp, updated=None):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO chats VALUES (?, ?, ?, ?, ?, ?)",
+                (chat_id, username, filename, title, timestamp, updated or time.time()))
+
+    def remove(self, chat_id):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM chats WHERE id = ?", (chat_id,))
+
+    def count(self, username):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM chats WHERE username = ?", (username,)).fetchone()[0]
+
+    def page(self, username, offset=0, limit=20):
+        """Most recently updated chats first, one indexed range scan."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT filename, title, timestamp, id FROM chats WHERE username = ? "
+                "ORDER BY updated DESC LIMIT ? OFFSET ?", (username, limit, offset)).fetchall()
+        return [{"filename": r[0], "title": r[1] or "Untitled", "timestamp": r[2] or "", "id": r[3]} for r in rows]
+
+    def get(self, chat_id):
+        with self.lock:
+            r = self.conn.execute("SELECT filename, title, timestamp, id, username FROM chats WHERE id = ?", (chat_id,)).fetchone()
+        return {"filename": r[0], "title": r[1] or "Untitled", "timestamp": r[2] or "", "id": r[3], "username": r[4]} if r else None
+
+    def rebuild(self):
+        """Re-index every chat file on disk. Returns the number of chats indexed."""
+        rows = []
+        files = {}
+        for f in list(self.chats_dir.glob("*.json")) + list(self.chats_dir.glob("*.jsonl")):
+            files[f.stem] = max(files.get(f.stem, 0), os.path.getmtime(f))
+        for chat_id, mtime in files.items():
+            try:
+                data = read_chat(self.chats_dir, chat_id)
+                rows.append((data.get("id") or chat_id, data.get("username") or "", f"{chat_id}.json",
+                             data.get("title", "Untitled"), data.get("timestamp", ""), mtime))
+            except: continue
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM chats")
+            self.conn.executemany("INSERT OR REPLACE INTO chats VALUES (?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
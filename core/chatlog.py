@@ -0,0 +1,110 @@
+import json, os, threading
+from datetime import datetime
+from pathlib import Path
+
+def read_chat(chats_dir, chat_id):
+    """Legacy JSON snapshot plus any appended log records replayed on top of it."""
+    chats_dir = Path(chats_dir)
+    base, log = chats_dir / f"{chat_id}.json", chats_dir / f"{chat_id}.jsonl"
+    data = None
+    if base.exists():
+        with open(base, "r") as f: data = json.load(f)
+    if log.exists():
+        with open(log, "r") as f:
+            for line in f:
+                try: rec = json.loads(line)
+                except ValueError: continue # torn record from a crash mid-append
+                if data is None: data = {"id": chat_id, "username": None, "title": "New Conversation", "timestamp": "", "messages": []}
+                if "username" in rec: data["username"] = rec["username"]
+                if "add" in rec: data["messages"] = data["messages"][:rec["at"]] + rec["add"]
+                for k in ("title", "timestamp", "summary"):
+                    if k in rec: data[k] = rec[k]
+    if data is None: raise FileNotFoundError(base)
+    return data
+
+def write_chat(chats_dir, data):
+    """Atomically write a full chat snapshot as <id>.json, replacing any log for it."""
+    chats_dir = Path(chats_dir)
+    base = chats_dir / f"{data['id']}.json"
+    tmp = base.with_suffix(".json.tmp")
+    with open(tmp, "w") as f: json.dump(data, f, indent=4)
+    os.replace(tmp, base)
+    log = chats_dir / f"{data['id']}.jsonl"
+    if log.exists(): os.remove(log)
+
+class ChatStore:
+    """Chat persistence. In "log" mode each save appends only the new messages
+    to <id>.jsonl and the log is folded back into <id>.json every
+    `compact_every` records; "json" mode rewrites <id>.json like before."""
+
+    def __init__(self, chats_dir, mode="log", compact_every=50):
+        self.chats_dir = Path(chats_dir)
+        self.mode = mode
+        self.compact_every = compact_every
+        self.lock = threading.Lock()
+        self.saved = {}    # chat_id -> (messages persisted, title, summary)
+        self.records = {}  # chat_id -> records in the current log
+
+    def base_path(self, chat_id): return self.chats_dir / f"{chat_id}.json"
+    def log_path(self, chat_id): return self.chats_dir / f"{chat_id}.jsonl"
+
+    def exists(self, chat_id):
+        return self.base_path(chat_id).exists() or self.log_path(chat_id).exists()
+
+    def load(self, chat_id):
+        data = read_chat(self.chats_dir, chat_id)
+        with self.lock: self.saved[chat_id] = (len(data["messages"]), data.get("title"), data.get("summary"))
+        return data
+
+    def save(self, chat_id, username, title, messages, summary=None):
+        """Persist `messages` (and the rolling context summary, if any) and return the chat timestamp."""
+        timestamp = datetime.now().isoformat()
+        if self.mode != "log":
+            data = {"id": chat_id, "username": username, "title": title, "timestamp": timestamp, "messages": messages}
+            if summary: data["summary"] = summary
+            self._write_base(chat_id, data)
+            return timestamp
+        with self.lock:
+            if chat_id not in self.saved:
+                try: prev = read_chat(self.chats_dir, chat_id); self.saved[chat_id] = (len(prev["messages"]), prev.get("title"), prev.get("summary"))
+                except FileNotFoundError: self.saved[chat_id] = (0, None, None)
+            at, old_title, old_summary = self.saved[chat_id]
+            at = min(at, len(messages))
+            rec = {"at": at, "add": messages[at:], "timestamp": timestamp}
+            if title != old_title: rec["title"] = title
+            if summary and summary != old_summary: rec["summary"] = summary
+            if not self.exists(chat_id): rec["username"] = username
+            self._append(chat_id, rec)
+            self.saved[chat_id] = (len(messages), title, summary or old_summary)
+            self.records[chat_id] = self.records.get(chat_id, 0) + 1
+            if self.records[chat_id] >= self.compact_every: self._compact(chat_id)
+        return timestamp
+
+    def compact(self, chat_id):
+        with self.lock: self._compact(chat_id)
+
+    def delete(self, chat_id):
+        with self.lock:
+            for p in (self.base_path(chat_id), self.log_path(chat_id)):
+                if p.exists(): os.remove(p)
+            self.saved.pop(chat_id, None); self.records.pop(chat_id, None)
+
+    def _append(self, chat_id, rec):
+        with open(self.log_path(chat_id), "a+b") as f:
+            torn = False
+            if f.seek(0, os.SEEK_END) > 0:
+                f.seek(-1, os.SEEK_END); torn = f.read(1) != b"\n"
+            f.write((("\n" if torn else "") + json.dumps(rec) + "\n").encode())
+            f.flush(); os.fsync(f.fileno())
+
+    def _compact(self, chat_id):
+        if not self.log_path(chat_id).exists(): return
+        self._write_base(chat_id, read_chat(self.chats_dir, chat_id))
+        # Records carry absolute positions, so a crash before this unlink only replays no-ops.
+        os.remove(self.log_path(chat_id))
+        self.records[chat_id] = 0
+
+    def _write_base(self, chat_id, data):
+        tmp = self.base_path(chat_id).with_suffix(".json.tmp")
+        with open(tmp, "w") as f: json.dump(data, f, indent=4)
+        os.replace(tmp, self.base_path(chat_id))
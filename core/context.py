@@ -0,0 +1,74 @@
+SUMMARY_TURN = "Summary of our earlier conversation:\n"
+SUMMARY_REPLY = "Understood."
+SUMMARY_PROMPT = ("Summarize the following conversation in a few short paragraphs. Keep names, facts, "
+                  "decisions and open questions; drop pleasantries.\n\n")
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token), good enough for budgeting."""
+    return len(text) // 4 + 1
+
+def summary_tokens(text):
+    """Budget taken by the two turns that carry a summary into the history."""
+    return estimate_tokens(SUMMARY_TURN + text) + estimate_tokens(SUMMARY_REPLY) if text else 0
+
+def to_content(msg):
+    return {"role": "model" if msg["role"] == "assistant" else "user", "parts": [msg["content"]]}
+
+def transcript(messages):
+    return "\n".join(f"{m['role'].upper()}: {m['content']}" for m in messages)
+
+def extractive_summary(previous, messages, limit=200, max_chars=4000):
+    """Fallback summarizer that needs no model: the head of every message, newest kept."""
+    lines = [previous] if previous else []
+    lines += [f"{m['role']}: {m['content'][:limit]}" for m in messages]
+    return "\n".join(lines)[-max_chars:]
+
+class ContextBuilder:
+    """Turns stored messages into Gemini chat history within a token budget.
+
+    The newest turns are sent verbatim; everything older is folded into a rolling
+    summary `{"upto": index, "text": ...}`. The summary is only recomputed when the
+    window has to move, and then the window jumps forward far enough to leave
+    `slack` of the budget free so the next few turns reuse it.
+    """
+
+    def __init__(self, budget=6000, summarize=None, slack=0.25):
+        self.budget = budget
+        self.summarize = summarize or extractive_summary
+        self.slack = slack
+
+    def window_start(self, messages, budget, floor=0):
+        used, start = 0, len(messages)
+        for i in range(len(messages) - 1, floor - 1, -1):
+            used += estimate_tokens(messages[i]["content"])
+            if used > budget: break
+            start = i
+        while start < len(messages) and messages[start]["role"] != "user": start += 1
+        return start
+
+    def build(self, messages, summary=None):
+        """Return `(history, summary)`; `summary` is the one to persist with the chat."""
+        upto = summary["upto"] if summary else 0
+        text = summary["text"] if summary else ""
+        start = self.window_start(messages, self.budget - summary_tokens(text), upto)
+        # The new summary is usually longer than the old one, so the window is checked
+        # again against it and moved (and summarized) once more if it no longer fits.
+        while start > upto:
+            start = max(start, self.window_start(messages, int(self.budget * (1 - self.slack)) - summary_tokens(text), upto))
+            text = self.summarize(text, messages[upto:start])
+            upto, summary = start, {"upto": start, "text": text}
+            start = self.window_start(messages, self.budget - summary_tokens(text), upto)
+        history = []
+        if summary and summary["text"]:
+            history.append({"role": "user", "parts": [SUMMARY_TURN + summary["text"]]})
+            history.append({"role": "model", "parts": [SUMMARY_REPLY]})
+        history += [to_content(m) for m in messages[upto:]]
+        return history, summary
+
+def model_summarizer(generate):
+    """Wrap `generate(prompt) -> str` as a rolling summarizer, falling back to the extractive one."""
+    def summarize(previous, messages):
+        head = f"Earlier summary:\n{previous}\n\n" if previous else ""
+        try: return generate(SUMMARY_PROMPT + head + transcript(messages)).strip()
+        except Exception: return extractive_summary(previous, messages)
+    return summarize
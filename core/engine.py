@@ -0,0 +1,88 @@
+import time
+from core.cache import cache_key
+from core.context import ContextBuilder, estimate_tokens, model_summarizer
+from core.models import ModelUnavailable
+from core.scheduler import RequestTimeout, SchedulerBusy
+from core.usage import QuotaExceeded, usage_from_chunk
+
+def quota_message(e):
+    wait = f"{e.retry_after / 60:.0f} min" if e.retry_after >= 60 else f"{e.retry_after:.0f}s"
+    return f"Quota Exceeded: {e}. Try again in {wait}."
+
+class ChatEngine:
+    """One chat turn's model path: response cache, per-user quota, fair scheduler,
+    model pool fallback, usage accounting and metrics. Shared by every session;
+    the app and the benchmarks both drive it."""
+
+    def __init__(self, pool, scheduler, cache, usage, metrics, cache_models, ready=True, context_budget=6000):
+        self.pool = pool
+        self.scheduler = scheduler
+        self.cache = cache
+        self.usage = usage
+        self.metrics = metrics
+        self.cache_models = list(cache_models)
+        self.ready = ready
+        self.context_budget = context_budget
+
+    def build_context(self, username, session_id, messages, summary=None):
+        """Trim `messages` to the context budget, returning `(history, summary)` like
+        ContextBuilder.build. The quota is checked first, so a user over quota triggers
+        no summarizing call, and summaries go through the scheduler and count as usage.
+        Raises QuotaExceeded."""
+        try: self.usage.check(username)
+        except QuotaExceeded:
+            self.metrics.inc("quota_rejections_total"); raise
+        summarize = model_summarizer(lambda text: self.generate(username, session_id, text)) if self.ready else None
+        return ContextBuilder(self.context_budget, summarize).build(messages, summary)
+
+    def generate(self, username, session_id, text):
+        """Uncached, non-streaming completion under the same quota, scheduler and usage rules as a reply."""
+        estimate = estimate_tokens(text)
+        self.usage.check(username, estimate)
+        self.metrics.inc("prompts_total", source="summary")
+        parts, usage = [], None
+        try:
+            for chunk in self.scheduler.stream(username, self.pool.stream, text, cancellable=True):
+                usage = usage_from_chunk(chunk) or usage
+                if chunk.text: parts.append(chunk.text)
+        finally: self._record(username, session_id, usage, estimate, parts)
+        return "".join(parts)
+
+    def stream(self, username, session_id, prompt, history=()):
+        """Yield the reply to `prompt` as text chunks; failures are reported as text, never raised."""
+        if not self.ready: yield "System Error: API Key missing."; return
+        metrics = self.metrics
+        ck = cache_key(prompt, self.cache_models, history)
+        cached = self.cache.get(ck)
+        if cached is not None:
+            metrics.inc("prompts_total", source="cache")
+            yield from cached; return
+        contents = list(history) + [{"role": "user", "parts": [prompt]}]
+        estimate = sum(estimate_tokens(p) for c in contents for p in c["parts"])
+        try: self.usage.check(username, estimate)
+        except QuotaExceeded as e:
+            metrics.inc("quota_rejections_total")
+            yield quota_message(e); return
+        metrics.inc("prompts_total", source="model")
+        parts, started, usage = [], time.monotonic(), None
+        try:
+            for chunk in self.scheduler.stream(username, self.pool.stream, contents, cancellable=True):
+                usage = usage_from_chunk(chunk) or usage # Gemini reports totals on the last chunk
+                if chunk.text:
+                    if not parts: metrics.observe("time_to_first_token", time.monotonic() - started)
+                    parts.append(chunk.text); yield chunk.text
+            metrics.observe("generation", time.monotonic() - started)
+            self.cache.put(ck, parts, time.monotonic() - started)
+        except Exception as e:
+            metrics.inc("model_errors_total", kind=type(e).__name__)
+            if isinstance(e, ModelUnavailable): yield "Connection Failed."
+            elif isinstance(e, SchedulerBusy): yield "System Busy: finish your pending requests first."
+            elif isinstance(e, RequestTimeout): yield "\n\n`Response timed out.`" if parts else "System Error: Request timed out."
+            else: yield f"Error: {str(e)}"
+        finally: self._record(username, session_id, usage, estimate, parts)
+
+    def _record(self, username, session_id, usage, estimate, parts):
+        # Estimated locally when the backend sends no usage metadata (or the stream was cut short)
+        if usage or parts:
+            prompt_tokens, response_tokens = usage or (estimate, estimate_tokens("".join(parts)))
+            self.usage.record(username, session_id, prompt_tokens, response_tokens)
@@ -0,0 +1,115 @@
+import json, os, threading, time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from pathlib import Path
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def percentile(values, q):
+    if not values: return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
+def label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+class Metrics:
+    """Spans, counters and histograms with cheap in-memory aggregation.
+
+    Every observation is buffered and appended to a rolling JSONL file by a
+    background flusher, which also rewrites a Prometheus text exposition file.
+    """
+
+    def __init__(self, jsonl_path, prom_path=None, max_bytes=20 * 1024 * 1024, flush_interval=5.0, clock=time.time):
+        self.jsonl_path = Path(jsonl_path)
+        self.prom_path = Path(prom_path) if prom_path else None
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.counters = defaultdict(float)                     # (name, labels) -> value
+        self.histograms = {}                                   # (name, labels) -> [bucket counts..., sum, count]
+        self.pending = []
+        self.stop = threading.Event()
+        if flush_interval:
+            threading.Thread(target=self._flush_loop, args=(flush_interval,), name="kai-metrics", daemon=True).start()
+
+    @contextmanager
+    def span(self, name, **labels):
+        started = time.perf_counter()
+        try: yield
+        finally: self.observe(name, time.perf_counter() - started, **labels)
+
+    def observe(self, name, seconds, **labels):
+        key = (name, label_key(labels))
+        with self.lock:
+            h = self.histograms.get(key)
+            if h is None: h = self.histograms[key] = [0] * len(BUCKETS) + [0.0, 0]
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound: h[i] += 1
+            h[-2] += seconds; h[-1] += 1
+            self.pending.append({"ts": self.clock(), "span": name, "ms": round(seconds * 1000, 3), **labels})
+
+    def inc(self, name, value=1, **labels):
+        with self.lock:
+            self.counters[(name, label_key(labels))] += value
+            self.pending.append({"ts": self.clock(), "counter": name, "value": value, **labels})
+
+    def flush(self):
+        with self.lock: batch, self.pending = self.pending, []
+        if batch:
+            self.jsonl_path.parent.mkdir(parents=True, exist_ok=True)
+            if self.jsonl_path.exists() and self.jsonl_path.stat().st_size > self.max_bytes:
+                os.replace(self.jsonl_path, self.jsonl_path.with_name(self.jsonl_path.name + ".1"))
+            with open(self.jsonl_path, "a") as f:
+                f.write("".join(json.dumps(r) + "\n" for r in batch))
+        if self.prom_path:
+            tmp = self.prom_path.with_name(self.prom_path.name + ".tmp")
+            tmp.write_text(self.prometheus())
+            os.replace(tmp, self.prom_path)
+
+    def prometheus(self):
+        """Prometheus text exposition format (counters and histograms, in seconds)."""
+        lines = []
+        with self.lock:
+            counters = dict(self.counters)
+            histograms = {k: list(v) for k, v in self.histograms.items()}
+        for name in sorted({n for n, _ in counters}):
+            lines.append(f"# TYPE kai_{name} counter")
+            for (n, labels), value in sorted(counters.items()):
+                if n == name: lines.append(f"kai_{name}{_fmt(labels)} {value:g}")
+        for name in sorted({n for n, _ in histograms}):
+            lines.append(f"# TYPE kai_{name}_seconds histogram")
+            for (n, labels), h in sorted(histograms.items()):
+                if n != name: continue
+                for bound, count in zip(BUCKETS, h):
+                    lines.append(f"kai_{name}_seconds_bucket{_fmt(labels + (('le', f'{bound:g}'),))} {count}")
+                lines.append(f"kai_{name}_seconds_bucket{_fmt(labels + (('le', '+Inf'),))} {h[-1]}")
+                lines.append(f"kai_{name}_seconds_sum{_fmt(labels)} {h[-2]:.6f}")
+                lines.append(f"kai_{name}_seconds_count{_fmt(labels)} {h[-1]}")
+        return "\n".join(lines) + "\n"
+
+    def _flush_loop(self, interval):
+        while not self.stop.wait(interval):
+            try: self.flush()
+            except Exception: pass
+
+def _fmt(labels):
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}" if labels else ""
+
+def summarize_jsonl(path, limit=50000):
+    """p50/p95/p99 per span and totals per counter from the newest `limit` records
+    of the rolling file (and its .1 backup), so every process's data is included."""
+    path = Path(path)
+    lines = deque(maxlen=limit)
+    for p in (path.with_name(path.name + ".1"), path):
+        if p.exists():
+            with open(p) as f: lines.extend(f)
+    spans, counters = defaultdict(list), defaultdict(float)
+    for line in lines:
+        try: r = json.loads(line)
+        except ValueError: continue
+        if "span" in r: spans[r["span"]].append(r["ms"])
+        elif "counter" in r: counters[r["counter"]] += r.get("value", 1)
+    table = {name: {"count": len(v), "p50": percentile(v, 50), "p95": percentile(v, 95), "p99": percentile(v, 99), "max": max(v)}
+             for name, v in spans.items()}
+    return table, dict(counters)
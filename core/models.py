@@ -0,0 +1,78 @@
+import time
+
+class ModelUnavailable(Exception):
+    """Every configured model is failing its health check or has its circuit open."""
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures and half-opens after `cooldown` seconds."""
+
+    def __init__(self, threshold=3, cooldown=30.0, clock=time.monotonic):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+
+    def allow(self):
+        return self.opened_at is None or self.clock() - self.opened_at >= self.cooldown
+
+    def record_success(self):
+        self.failures = 0; self.opened_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.threshold: self.opened_at = self.clock()
+
+class ModelPool:
+    """Process-wide model fallback in preference order over one ModelBackend.
+
+    Health checks are cached for `health_ttl` seconds and each model has its own
+    circuit breaker; the backend keeps the clients, so they are built once and
+    reused by every prompt.
+    """
+
+    def __init__(self, model_names, backend, failure_threshold=3, cooldown=30.0, health_ttl=300.0, clock=time.monotonic):
+        self.model_names = list(model_names)
+        self.backend = backend
+        self.health_ttl = health_ttl
+        self.clock = clock
+        self.checked_at = {}
+        self.breakers = {m: CircuitBreaker(failure_threshold, cooldown, clock) for m in self.model_names}
+
+    def healthy(self, name):
+        """Run the health check at most once per `health_ttl` per model."""
+        if not self.breakers[name].allow(): return False
+        last = self.checked_at.get(name)
+        if last is not None and self.clock() - last < self.health_ttl: return True
+        try:
+            self.backend.health_check(name)
+        except Exception:
+            self.breakers[name].record_failure(); return False
+        self.checked_at[name] = self.clock()
+        return True
+
+    def status(self):
+        return {m: {"open": not b.allow(), "failures": b.failures} for m, b in self.breakers.items()}
+
+    def stream(self, prompt, cancel=None):
+        """Yield response chunks, falling back to the next model if one fails before producing output.
+        Closing this generator (or setting `cancel`) stops the backend's stream too."""
+        last_error = None
+        for name in self.model_names:
+            if not self.healthy(name): continue
+            started = False
+            chunks = self.backend.stream(name, prompt, cancel)
+            try:
+                for chunk in chunks:
+                    started = True
+                    yield chunk
+                self.breakers[name].record_success()
+                return
+            except Exception as e:
+                self.breakers[name].record_failure()
+                self.checked_at.pop(name, None)
+                if started: raise
+                last_error = e
+            finally:
+                chunks.close()
+        raise ModelUnavailable(str(last_error) if last_error else "No model available.")
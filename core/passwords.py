@@ -0,0 +1,57 @@
+import hashlib, hmac, os
+
+SCRYPT_DEFAULTS = {"n": 2 ** 14, "r": 8, "p": 1}
+PBKDF2_DEFAULTS = {"iterations": 600_000}
+
+def _legacy(stored):
+    return len(stored) == 64 and "$" not in stored
+
+class PasswordHasher:
+    """Salted, cost-tunable password hashes with constant-time verification.
+
+    Stored formats:
+        scrypt$<n>$<r>$<p>$<salt hex>$<hash hex>
+        pbkdf2_sha256$<iterations>$<salt hex>$<hash hex>
+        <64 hex chars>   legacy unsalted SHA-256, accepted but flagged for rehash
+    """
+
+    def __init__(self, scheme="scrypt", **cost):
+        if scheme not in ("scrypt", "pbkdf2_sha256"): raise ValueError(f"Unknown scheme: {scheme}")
+        self.scheme = scheme
+        self.cost = dict(SCRYPT_DEFAULTS if scheme == "scrypt" else PBKDF2_DEFAULTS, **cost)
+
+    def hash(self, password):
+        salt = os.urandom(16)
+        if self.scheme == "scrypt":
+            c = self.cost
+            digest = _scrypt(password, salt, c["n"], c["r"], c["p"])
+            return f"scrypt${c['n']}${c['r']}${c['p']}${salt.hex()}${digest.hex()}"
+        digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt, self.cost["iterations"])
+        return f"pbkdf2_sha256${self.cost['iterations']}${salt.hex()}${digest.hex()}"
+
+    def verify(self, password, stored):
+        if not stored: return False
+        try:
+            if _legacy(stored):
+                return hmac.compare_digest(hashlib.sha256(password.encode()).hexdigest(), stored)
+            parts = stored.split("$")
+            if parts[0] == "scrypt":
+                n, r, p, salt, digest = int(parts[1]), int(parts[2]), int(parts[3]), parts[4], parts[5]
+                return hmac.compare_digest(_scrypt(password, bytes.fromhex(salt), n, r, p).hex(), digest)
+            if parts[0] == "pbkdf2_sha256":
+                iterations, salt, digest = int(parts[1]), parts[2], parts[3]
+                return hmac.compare_digest(hashlib.pbkdf2_hmac("sha256", password.encode(), bytes.fromhex(salt), iterations).hex(), digest)
+        except (ValueError, IndexError): pass
+        return False
+
+    def needs_rehash(self, stored):
+        """True for legacy hashes and hashes made with another scheme or cost."""
+        if _legacy(stored): return True
+        parts = stored.split("$")
+        if parts[0] != self.scheme: return True
+        if self.scheme == "scrypt":
+            return [int(x) for x in parts[1:4]] != [self.cost["n"], self.cost["r"], self.cost["p"]]
+        return int(parts[1]) != self.cost["iterations"]
+
+def _scrypt(password, salt, n, r, p):
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, maxmem=256 * n * r + (1 << 20), dklen=32)
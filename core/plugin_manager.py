@@ -0,0 +1,138 @@
+import ast, importlib, threading, time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from pathlib import Path
+
+PREFIX = "/"
+
+def scan_plugin(path):
+    """Read `register()`'s command table from source without importing the module.
+
+    Returns {command: docstring first line}, or None when `register` does not
+    return a plain dict literal and the module has to be imported to find out.
+    """
+    tree = ast.parse(Path(path).read_text())
+    funcs = {n.name: n for n in tree.body if isinstance(n, ast.FunctionDef)}
+    reg = funcs.get("register")
+    if reg is None: return {}
+    returns = [n.value for n in ast.walk(reg) if isinstance(n, ast.Return)]
+    if len(returns) != 1 or not isinstance(returns[0], ast.Dict): return None
+    table = {}
+    for k, v in zip(returns[0].keys, returns[0].values):
+        if not (isinstance(k, ast.Constant) and isinstance(k.value, str)): return None
+        doc = ast.get_docstring(funcs[v.id]) if isinstance(v, ast.Name) and v.id in funcs else None
+        table[k.value] = doc.strip().splitlines()[0] if doc else ""
+    return table
+
+class PluginManager:
+    """Discovers `plugins/*.py`, routes "/command args" chat input and runs it off the UI thread.
+
+    The command table comes from the plugin sources, so heavy dependencies
+    (psutil, Crypto, ...) are only imported when one of a plugin's commands is
+    first used. A command returns text to show, or {"prompt": ...} to have the
+    model answer that prompt instead.
+
+    Commands in `admin_only` run only for admins. Commands in `secret` handle
+    private data; callers must not persist their input or output.
+    """
+
+    def __init__(self, plugin_dir, config, package="plugins", max_workers=2, timeout=30.0, admin_only=(), secret=()):
+        self.plugin_dir = Path(plugin_dir)
+        self.config = config
+        self.package = package
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.admin_only = set(admin_only)
+        self.secret = set(secret)
+        self.lock = threading.Lock()
+        self.pool = ThreadPoolExecutor(max_workers, thread_name_prefix="kai-plugin")
+        self.running = {} # id -> (command, start time); threads cannot be killed, so overdue ones are reported as stuck
+        self.owners = {}  # command -> module name
+        self.help = {}    # command -> description
+        self.loaded = {}  # module name -> {command: function}
+        self.timings = {} # command -> {"calls", "errors", "total", "max", "last"}
+        self.discover()
+
+    def discover(self):
+        for path in sorted(self.plugin_dir.glob("*.py")):
+            if path.stem.startswith("_"): continue
+            try: table = scan_plugin(path)
+            except SyntaxError: continue
+            if table is None:
+                table = {c: "" for c in self._load(path.stem)}
+            for command, doc in table.items():
+                self.owners[command] = path.stem
+                self.help[command] = doc
+        return sorted(self.owners)
+
+    def resolve(self, text):
+        """Split "/command args" into (command, args) if the command exists, else None."""
+        if not text.startswith(PREFIX): return None
+        command, _, args = text[len(PREFIX):].strip().partition(" ")
+        if command == "help" or command in self.owners: return command, args.strip()
+        return None
+
+    def allowed(self, command, is_admin=False):
+        return is_admin or command not in self.admin_only
+
+    def is_secret(self, command):
+        return command in self.secret
+
+    def stuck(self):
+        """[(command, seconds running)] for calls still holding a worker past the timeout."""
+        now = time.perf_counter()
+        with self.lock: return [(c, now - t) for c, t in self.running.values() if now - t > self.timeout]
+
+    def submit(self, command, args="", is_admin=False):
+        return self.pool.submit(self._execute, command, args, is_admin)
+
+    def run(self, command, args="", is_admin=False, timeout=None, progress=None, tick=0.25):
+        """Run a command and return its result, giving up after `timeout` seconds.
+
+        `progress(elapsed)` is called every `tick` seconds while waiting, so the
+        caller can keep its UI live. When every worker is stuck the call is
+        refused at once instead of queueing behind them.
+        """
+        if not self.allowed(command, is_admin): return f"Permission denied: {PREFIX}{command} is restricted to admins."
+        stuck = self.stuck()
+        if len(stuck) >= self.max_workers:
+            return "Plugin workers busy: " + ", ".join(f"{PREFIX}{c} running for {t:.0f}s" for c, t in stuck)
+        timeout = timeout or self.timeout
+        future, started = self.submit(command, args, is_admin), time.perf_counter()
+        while True:
+            try: return future.result(tick)
+            except FutureTimeout:
+                elapsed = time.perf_counter() - started
+                if elapsed >= timeout:
+                    future.cancel() # only succeeds while still queued
+                    return f"Plugin timed out after {elapsed:.1f}s: {command}"
+                if progress: progress(elapsed)
+
+    def stats(self):
+        with self.lock: return {c: dict(t) for c, t in self.timings.items()}
+
+    def _load(self, module):
+        with self.lock:
+            if module not in self.loaded:
+                mod = importlib.import_module(f"{self.package}.{module}")
+                self.loaded[module] = mod.register(self.config)
+            return self.loaded[module]
+
+    def _execute(self, command, args, is_admin=False):
+        if command == "help":
+            commands = [c for c in sorted(self.owners) if self.allowed(c, is_admin)]
+            return "\n".join(f"{PREFIX}{c}  {self.help[c]}".rstrip() for c in commands) or "No plugins available."
+        started = time.perf_counter()
+        failed = False
+        with self.lock: self.running[id(threading.current_thread())] = (command, started)
+        try:
+            return self._load(self.owners[command])[command](self.config, args)
+        except Exception as e:
+            failed = True
+            return f"Plugin error ({command}): {e}"
+        finally:
+            elapsed = time.perf_counter() - started
+            with self.lock:
+                self.running.pop(id(threading.current_thread()), None)
+                t = self.timings.setdefault(command, {"calls": 0, "errors": 0, "total": 0.0, "max": 0.0, "last": 0.0})
+                t["calls"] += 1; t["errors"] += failed
+                t["total"] += elapsed; t["max"] = max(t["max"], elapsed); t["last"] = elapsed
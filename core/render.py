@@ -0,0 +1,28 @@
+import time
+
+def coalesce(chunks, interval=0.05, max_chunks=None, clock=time.monotonic):
+    """Group a chunk stream into batches, one per UI frame.
+
+    The first chunk is flushed straight away; after that a batch is emitted once
+    `interval` seconds have passed or `max_chunks` chunks are pending.
+    """
+    pending, last = [], None
+    for chunk in chunks:
+        pending.append(chunk)
+        now = clock()
+        if last is None or now - last >= interval or (max_chunks and len(pending) >= max_chunks):
+            yield pending
+            pending, last = [], now
+    if pending: yield pending
+
+def window_start(messages, limit):
+    """Index of the first of the last `limit` messages (at least one), moved back to the start of that turn."""
+    start = max(0, len(messages) - max(1, limit))
+    while start > 0 and messages[start]["role"] != "user": start -= 1
+    return start
+
+def prepare_markdown(content):
+    """Message text as handed to st.markdown. Closes an unterminated code fence
+    (e.g. a cut-off reply) so it can't swallow the page."""
+    if content.count("```") % 2: content += "\n```"
+    return content
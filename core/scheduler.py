@@ -0,0 +1,175 @@
+import queue, threading, time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+class SchedulerBusy(Exception):
+    """The user already has too many requests waiting."""
+
+class RequestTimeout(Exception):
+    """The request did not finish within the scheduler timeout."""
+
+_DONE = object()
+
+class _Failed:
+    def __init__(self, error): self.error = error
+
+class TokenBucket:
+    """Blocking token bucket: `rate` requests per second with bursts up to `burst`."""
+
+    def __init__(self, rate, burst=1, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = self.clock()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1; return
+                wait = (1 - self.tokens) / self.rate
+            self.sleep(wait)
+
+class Ticket:
+    def __init__(self, user, fn, args, timeout, cancellable=False):
+        self.user = user
+        self.fn = fn
+        self.args = args
+        self.cancellable = cancellable
+        self.enqueued = time.monotonic()
+        self.deadline = self.enqueued + timeout if timeout else None
+        self.cancelled = threading.Event()
+        self.out = queue.Queue()
+        self.outcome = None # the metrics counter this ticket ended in, set once
+
+    def cancel(self): self.cancelled.set()
+
+    def remaining(self):
+        return None if self.deadline is None else max(0.0, self.deadline - time.monotonic())
+
+class Scheduler:
+    """Fair, bounded front door for model calls shared by every Streamlit session.
+
+    Requests wait in per-user FIFO queues that are served round-robin, at most
+    `max_concurrent` run at once, starts are throttled by an optional token
+    bucket, and each request is cut off after `timeout` seconds or as soon as
+    its consumer goes away.
+    """
+
+    def __init__(self, max_concurrent=4, rate_per_minute=None, burst=4, timeout=120.0, max_queued_per_user=3):
+        self.max_concurrent = max_concurrent
+        self.timeout = timeout
+        self.max_queued_per_user = max_queued_per_user
+        self.bucket = TokenBucket(rate_per_minute / 60.0, burst) if rate_per_minute else None
+        self.pool = ThreadPoolExecutor(max_concurrent, thread_name_prefix="kai-model")
+        self.cond = threading.Condition()
+        self.queues = {}     # user -> deque of tickets
+        self.order = deque() # users with waiting tickets, round-robin
+        self.active = 0
+        self.metrics = {"submitted": 0, "completed": 0, "failed": 0, "cancelled": 0, "timeouts": 0, "rejected": 0,
+                        "wait_total": 0.0, "wait_max": 0.0, "started": 0}
+        threading.Thread(target=self._dispatch, name="kai-scheduler", daemon=True).start()
+
+    def submit(self, user, fn, *args, cancellable=False):
+        """Queue `fn(*args)`, a generator function, and return its ticket. With
+        `cancellable`, fn is also passed `cancel=` the ticket's cancellation event
+        so it can stop while blocked rather than at its next item."""
+        ticket = Ticket(user, fn, args, self.timeout, cancellable)
+        with self.cond:
+            pending = self.queues.setdefault(user, deque())
+            if len(pending) >= self.max_queued_per_user:
+                self.metrics["rejected"] += 1
+                if not pending: del self.queues[user]
+                raise SchedulerBusy(f"{user} has {len(pending)} requests waiting.")
+            if not pending: self.order.append(user)
+            pending.append(ticket)
+            self.metrics["submitted"] += 1
+            self.cond.notify_all()
+        return ticket
+
+    def stream(self, user, fn, *args, cancellable=False):
+        """Submit and yield the results as they arrive; closing the generator cancels the request."""
+        ticket = self.submit(user, fn, *args, cancellable=cancellable)
+        try:
+            while True:
+                try: item = ticket.out.get(timeout=ticket.remaining())
+                except queue.Empty:
+                    with self.cond: self._settle(ticket, "timeouts")
+                    raise RequestTimeout(f"No response within {self.timeout:.0f}s.")
+                if item is _DONE: return
+                if isinstance(item, _Failed): raise item.error
+                yield item
+        finally:
+            ticket.cancel()
+
+    def stats(self):
+        with self.cond:
+            m = dict(self.metrics)
+            m["queue_depth"] = sum(len(q) for q in self.queues.values())
+            m["queue_by_user"] = {u: len(q) for u, q in self.queues.items()}
+            m["active"] = self.active
+        m["wait_avg"] = m["wait_total"] / m["started"] if m["started"] else 0.0
+        return m
+
+    def _settle(self, ticket, outcome):
+        # Called with self.cond held. The first outcome wins, so a request the consumer
+        # gave up on (timeouts) is not counted again when its worker stops (cancelled).
+        if ticket.outcome is None:
+            ticket.outcome = outcome
+            self.metrics[outcome] += 1
+
+    def _next_ticket(self):
+        user = self.order.popleft()
+        pending = self.queues[user]
+        ticket = pending.popleft()
+        if pending: self.order.append(user)
+        else: del self.queues[user]
+        return ticket
+
+    def _dispatch(self):
+        while True:
+            with self.cond:
+                while not (self.order and self.active < self.max_concurrent): self.cond.wait()
+                ticket = self._next_ticket()
+                if ticket.cancelled.is_set():
+                    self._settle(ticket, "cancelled"); continue
+                self.active += 1
+            if self.bucket: self.bucket.acquire()
+            self.pool.submit(self._run, ticket)
+
+    def _run(self, ticket):
+        waited = time.monotonic() - ticket.enqueued
+        outcome = "completed"
+        with self.cond:
+            self.metrics["started"] += 1
+            self.metrics["wait_total"] += waited
+            self.metrics["wait_max"] = max(self.metrics["wait_max"], waited)
+        gen = None
+        try:
+            gen = ticket.fn(*ticket.args, cancel=ticket.cancelled) if ticket.cancellable else ticket.fn(*ticket.args)
+            for item in gen:
+                if ticket.cancelled.is_set():
+                    outcome = "cancelled"; break
+                if ticket.remaining() == 0.0:
+                    # Must reach the consumer as an error: a plain _DONE would pass a truncated reply off as complete
+                    outcome = "timeouts"
+                    ticket.out.put(_Failed(RequestTimeout(f"No complete response within {self.timeout:.0f}s."))); break
+                ticket.out.put(item)
+            else:
+                if ticket.cancelled.is_set(): outcome = "cancelled"
+        except Exception as e:
+            outcome = "failed"
+            ticket.out.put(_Failed(e))
+        finally:
+            if gen is not None and hasattr(gen, "close"): gen.close()
+            ticket.out.put(_DONE)
+            with self.cond:
+                self.active -= 1
+                self._settle(ticket, outcome)
+                self.cond.notify_all()
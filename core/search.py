@@ -0,0 +1,95 @@
+import hashlib, re, sqlite3, threading
+from pathlib import Path
+from core.chatlog import read_chat
+
+# docs holds one row per message; msg_fts is an external-content FTS5 index over it
+# kept in sync by triggers. Every row also carries an `owner` token so a search is
+# an intersection of posting lists rather than a filter over everyone's hits.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id INTEGER PRIMARY KEY,
+    chat_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    role TEXT,
+    owner TEXT NOT NULL,
+    content TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_docs_chat ON docs(chat_id, seq);
+CREATE TABLE IF NOT EXISTS indexed (chat_id TEXT PRIMARY KEY, count INTEGER NOT NULL);
+CREATE VIRTUAL TABLE IF NOT EXISTS msg_fts USING fts5(content, owner, content='docs', content_rowid='id', tokenize='porter unicode61');
+CREATE TRIGGER IF NOT EXISTS docs_ai AFTER INSERT ON docs BEGIN
+    INSERT INTO msg_fts(rowid, content, owner) VALUES (new.id, new.content, new.owner);
+END;
+CREATE TRIGGER IF NOT EXISTS docs_ad AFTER DELETE ON docs BEGIN
+    INSERT INTO msg_fts(msg_fts, rowid, content, owner) VALUES ('delete', old.id, old.content, old.owner);
+END;
+"""
+
+def owner_token(username):
+    return "u" + hashlib.sha1(str(username).encode()).hexdigest()[:16]
+
+def match_expression(query):
+    """Plain words -> AND of quoted terms, the last one as a prefix (search-as-you-type)."""
+    terms = re.findall(r"\w+", query)
+    if not terms: return None
+    quoted = [f'"{t}"' for t in terms]
+    quoted[-1] += "*"
+    return " AND ".join(quoted)
+
+class ChatSearchIndex:
+    """Incrementally maintained full-text index over every user's chat messages."""
+
+    def __init__(self, db_path, chats_dir):
+        self.db_path = Path(db_path)
+        self.chats_dir = Path(chats_dir)
+        self.lock = threading.Lock()
+        fresh = not self.db_path.exists()
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        if fresh: self.rebuild()
+
+    def add(self, chat_id, username, messages):
+        """Index messages not seen yet for this chat; cheap to call after every save."""
+        with self.lock, self.conn:
+            row = self.conn.execute("SELECT count FROM indexed WHERE chat_id = ?", (chat_id,)).fetchone()
+            done = row[0] if row else 0
+            if done > len(messages): # chat was rewritten shorter: reindex it
+                self.conn.execute("DELETE FROM docs WHERE chat_id = ?", (chat_id,)); done = 0
+            owner = owner_token(username)
+            self.conn.executemany("INSERT INTO docs(chat_id, seq, role, owner, content) VALUES (?, ?, ?, ?, ?)",
+                                  [(chat_id, i, m.get("role"), owner, m.get("content", "")) for i, m in enumerate(messages[done:], done)])
+            self.conn.execute("INSERT OR REPLACE INTO indexed VALUES (?, ?)", (chat_id, len(messages)))
+
+    def remove(self, chat_id):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM docs WHERE chat_id = ?", (chat_id,))
+            self.conn.execute("DELETE FROM indexed WHERE chat_id = ?", (chat_id,))
+
+    def search(self, username, query, limit=20):
+        """Best-matching messages for one user: [{chat_id, seq, role, snippet, score}].
+
+        Snippets mark hits with \\x02 ... \\x03 so the caller can escape and highlight them.
+        """
+        expr = match_expression(query)
+        if not expr: return []
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT d.chat_id, d.seq, d.role, snippet(msg_fts, 0, char(2), char(3), '…', 16), bm25(msg_fts) AS score "
+                "FROM msg_fts JOIN docs d ON d.id = msg_fts.rowid "
+                "WHERE msg_fts MATCH ? ORDER BY score LIMIT ?",
+                (f'owner:{owner_token(username)} AND content:({expr})', limit)).fetchall()
+        return [{"chat_id": r[0], "seq": r[1], "role": r[2], "snippet": r[3], "score": -r[4]} for r in rows]
+
+    def rebuild(self):
+        """Re-index every chat on disk. Returns the number of chats indexed."""
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM docs"); self.conn.execute("DELETE FROM indexed")
+        ids = {f.stem for f in self.chats_dir.glob("*.json*") if f.suffix in (".json", ".jsonl")}
+        count = 0
+        for chat_id in ids:
+            try: data = read_chat(self.chats_dir, chat_id)
+            except Exception: continue
+            self.add(data.get("id") or chat_id, data.get("username"), data.get("messages", []))
+            count += 1
+        return count
@@ -0,0 +1,121 @@
+import json, os, threading, time
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
+from pathlib import Path
+
+FIELDS = ("requests", "prompt_tokens", "response_tokens", "cost")
+
+class QuotaExceeded(Exception):
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def usage_from_chunk(chunk):
+    """(prompt_tokens, response_tokens) from a Gemini chunk's usage_metadata, or None."""
+    meta = getattr(chunk, "usage_metadata", None)
+    prompt = getattr(meta, "prompt_token_count", None) if meta is not None else None
+    if not prompt: return None
+    return prompt, getattr(meta, "candidates_token_count", 0) or 0
+
+def new_totals(): return dict.fromkeys(FIELDS, 0)
+
+class UsageMeter:
+    """Per-user and per-session token accounting with daily and per-minute quotas.
+
+    Counters live in memory and a background thread rewrites `path` when they
+    change, so daily totals survive a restart. Quotas of 0/None are unlimited.
+    """
+
+    def __init__(self, path, daily_tokens=None, minute_tokens=None, prompt_price=0.0, response_price=0.0,
+                 keep_days=90, flush_interval=30.0, clock=time.time):
+        self.path = Path(path)
+        self.daily_tokens = daily_tokens
+        self.minute_tokens = minute_tokens
+        self.prompt_price, self.response_price = prompt_price, response_price # per 1k tokens
+        self.keep_days = keep_days
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.days = defaultdict(lambda: defaultdict(new_totals)) # day -> user -> totals
+        self.sessions = {}                                        # session id -> totals + user, day, updated
+        self.recent = defaultdict(deque)                          # user -> (time, tokens) within the last minute
+        self.dirty = False
+        self.stop = threading.Event()
+        self._load()
+        if flush_interval:
+            threading.Thread(target=self._flush_loop, args=(flush_interval,), name="kai-usage", daemon=True).start()
+
+    def day(self, ts=None): return datetime.fromtimestamp(self.clock() if ts is None else ts).strftime("%Y-%m-%d")
+
+    def check(self, user, estimate=0):
+        """Raise QuotaExceeded if spending `estimate` more tokens would break a quota."""
+        now = self.clock()
+        with self.lock:
+            if self.daily_tokens:
+                t = self.days.get(self.day(now), {}).get(user) or new_totals()
+                if t["prompt_tokens"] + t["response_tokens"] + estimate > self.daily_tokens:
+                    midnight = datetime.fromtimestamp(now).replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+                    raise QuotaExceeded(f"daily limit of {self.daily_tokens} tokens reached", midnight.timestamp() - now)
+            if self.minute_tokens:
+                window = self._window(user, now)
+                if window and sum(n for _, n in window) + estimate > self.minute_tokens:
+                    raise QuotaExceeded(f"{self.minute_tokens} tokens per minute exceeded", window[0][0] + 60 - now)
+
+    def record(self, user, session_id, prompt_tokens, response_tokens):
+        now = self.clock()
+        cost = (prompt_tokens * self.prompt_price + response_tokens * self.response_price) / 1000
+        delta = {"requests": 1, "prompt_tokens": prompt_tokens, "response_tokens": response_tokens, "cost": cost}
+        with self.lock:
+            day = self.day(now)
+            for totals in (self.days[day][user], self.sessions.setdefault(session_id, dict(new_totals(), user=user, day=day))):
+                for k, v in delta.items(): totals[k] += v
+            self.sessions[session_id].update(day=day, updated=now)
+            self._window(user, now).append((now, prompt_tokens + response_tokens))
+            self.dirty = True
+
+    def user_days(self, user, days=7):
+        """Newest first: [{"day", requests, prompt_tokens, response_tokens, cost}] for the last `days` days."""
+        now = datetime.fromtimestamp(self.clock())
+        with self.lock:
+            rows = []
+            for i in range(days):
+                day = (now - timedelta(days=i)).strftime("%Y-%m-%d")
+                t = self.days.get(day, {}).get(user)
+                if t: rows.append(dict(t, day=day))
+        return rows
+
+    def user_sessions(self, user, limit=20):
+        with self.lock:
+            rows = [dict(t, session_id=sid) for sid, t in self.sessions.items() if t["user"] == user]
+        return sorted(rows, key=lambda r: r.get("updated", 0), reverse=True)[:limit]
+
+    def flush(self):
+        with self.lock:
+            if not self.dirty: return
+            cutoff = (datetime.fromtimestamp(self.clock()) - timedelta(days=self.keep_days)).strftime("%Y-%m-%d")
+            for day in [d for d in self.days if d < cutoff]: del self.days[day]
+            for sid in [s for s, t in self.sessions.items() if t["day"] < cutoff]: del self.sessions[sid]
+            data = {"days": {d: {u: dict(t) for u, t in users.items()} for d, users in self.days.items()},
+                    "sessions": {sid: dict(t) for sid, t in self.sessions.items()}}
+            self.dirty = False
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w") as f: json.dump(data, f)
+        os.replace(tmp, self.path)
+
+    def _window(self, user, now):
+        window = self.recent[user]
+        while window and window[0][0] <= now - 60: window.popleft()
+        return window
+
+    def _load(self):
+        try:
+            with open(self.path) as f: data = json.load(f)
+        except (OSError, ValueError): return
+        for day, users in data.get("days", {}).items():
+            for user, totals in users.items(): self.days[day][user].update(totals)
+        self.sessions.update(data.get("sessions", {}))
+
+    def _flush_loop(self, interval):
+        while not self.stop.wait(interval):
+            try: self.flush()
+            except Exception: pass
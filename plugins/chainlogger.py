@@ -1,26 +1,150 @@
-import json, hashlib, datetime
+import json, hashlib, datetime, os, threading
+from contextlib import contextmanager
+from itertools import islice
+
+try:
+    import fcntl
+except ImportError: # Windows: fall back to in-process locking only
+    fcntl = None
+
+# The chain is an append-only JSONL file, one block per line. Older chains stored as
+# a single JSON array are converted in place the first time they are touched.
+_tails = {} # path -> (file size, last index, last hash)
+_lock = threading.Lock() # plugin commands run on a thread pool
+
+def block_hash(block):
+    body = {k: v for k, v in block.items() if k != 'hash'}
+    return hashlib.sha256(json.dumps(body, sort_keys=True).encode()).hexdigest()
+
+def _migrate(path):
+    with open(path, 'rb') as f:
+        legacy = f.read(1) == b'['
+    if not legacy: return
+    chain = json.loads(path.read_text())
+    tmp = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp, 'w') as f:
+        for block in chain: f.write(json.dumps(block) + '\n')
+    os.replace(tmp, path)
+
+@contextmanager
+def _appending(path):
+    """Serialize read-tail-then-append across threads, and across processes where flock exists."""
+    with _lock:
+        if fcntl is None:
+            yield; return
+        with open(path.with_suffix(path.suffix + '.lock'), 'w') as lf:
+            fcntl.flock(lf, fcntl.LOCK_EX)
+            try: yield
+            finally: fcntl.flock(lf, fcntl.LOCK_UN)
+
+def _last_lines(path, size, n=1):
+    """The last `n` full lines before byte `size`, read backwards from there."""
+    with open(path, 'rb') as f:
+        pos, buf = size, b''
+        while pos > 0 and buf.count(b'\n') <= n:
+            step = min(4096, pos); pos -= step
+            f.seek(pos); buf = f.read(step) + buf
+    lines = buf.rstrip(b'\n').split(b'\n')
+    if pos > 0: lines = lines[1:] # first piece may be a partial line
+    return [l for l in lines[-n:] if l]
+
+def _last_line(path, size):
+    lines = _last_lines(path, size)
+    return lines[-1] if lines else None
+
+def _index(line):
+    try: return json.loads(line)['index']
+    except (ValueError, TypeError, KeyError): return None
+
+def tail(path):
+    """(last index, last hash) in O(1), re-reading only the file's last line if it changed.
+    (None, None) when the last line is unreadable, e.g. an append cut off by a crash."""
+    if not path.exists(): return -1, "0"
+    size = path.stat().st_size
+    cached = _tails.get(str(path))
+    if cached and cached[0] == size: return cached[1], cached[2]
+    _migrate(path)
+    size = path.stat().st_size
+    line = _last_line(path, size) if size else None
+    try: last = json.loads(line) if line else None
+    except ValueError: return None, None
+    if last is not None and not (isinstance(last, dict) and {'index', 'hash'} <= last.keys()): return None, None
+    index, prev = (last['index'], last['hash']) if last else (-1, "0")
+    _tails[str(path)] = (size, index, prev)
+    return index, prev
 
 def log(config, data):
+    """<text>: append a block to the hash chain."""
     path = config['CHAIN_FILE']
-    chain = []
-    if path.exists():
-        chain = json.loads(path.read_text())
-    
-    prev = chain[-1]['hash'] if chain else "0"
-    block = {
-        "index": len(chain),
-        "time": str(datetime.datetime.now()),
-        "data": str(data),
-        "prev": prev
-    }
-    block['hash'] = hashlib.sha256(json.dumps(block, sort_keys=True).encode()).hexdigest()
-    chain.append(block)
-    path.write_text(json.dumps(chain, indent=2))
+    with _appending(path):
+        index, prev = tail(path)
+        if index is None: return "Chain broken: the last block is unreadable (interrupted write?). Run chain_verify full."
+        block = {
+            "index": index + 1,
+            "time": str(datetime.datetime.now()),
+            "data": str(data),
+            "prev": prev
+        }
+        block['hash'] = block_hash(block)
+        with open(path, 'a') as f:
+            f.write(json.dumps(block) + '\n')
+            size = f.tell()
+        _tails[str(path)] = (size, block['index'], block['hash'])
     return "Logged to chain."
 
 def view(config, args=None):
+    """[start] [end]: show blocks start..end-1 (default: the last 20)."""
+    path = config['CHAIN_FILE']
+    if not path.exists(): return "Empty chain."
+    index, _ = tail(path)
+    try: bounds = [int(x) for x in (args or "").split()]
+    except ValueError: return "Usage: chain_view [start] [end]"
+    if not bounds: lines = [l.decode(errors='replace') + '\n' for l in _last_lines(path, path.stat().st_size, 20)]
+    else:
+        start = max(bounds[0], 0)
+        end = bounds[1] if len(bounds) > 1 else start + 20
+        with open(path) as f: lines = list(islice(f, start, max(end, start)))
+    total = "?" if index is None else index + 1 # unreadable last block
+    if not lines: return f"No blocks in range (chain has {total})."
+    first, last = _index(lines[0]), _index(lines[-1])
+    return f"Blocks {'?' if first is None else first}-{'?' if last is None else last} of {total}:\n" + "".join(lines).rstrip('\n')
+
+def verify(config, args=None):
+    """[full]: check hash links from the last checkpoint onwards ("full" starts over)."""
     path = config['CHAIN_FILE']
-    return path.read_text() if path.exists() else "Empty chain."
+    if not path.exists(): return "Empty chain."
+    tail(path)
+    ckpt_path = path.with_suffix(path.suffix + '.verify')
+    ckpt = {"offset": 0, "index": -1, "hash": "0"}
+    if (args or "").strip() != "full" and ckpt_path.exists():
+        try: ckpt = json.loads(ckpt_path.read_text())
+        except ValueError: pass
+    if ckpt['offset']:
+        # Only resume if the verified prefix is still exactly what was verified
+        if path.stat().st_size < ckpt['offset']:
+            return f"Chain broken: file is shorter than the {ckpt['index'] + 1} blocks already verified (truncated)."
+        try: last = json.loads(_last_line(path, ckpt['offset']) or b'')
+        except ValueError: last = None
+        if not isinstance(last, dict) or last.get('index') != ckpt['index'] or last.get('hash') != ckpt['hash'] \
+                or block_hash(last) != ckpt['hash']:
+            return f"Chain broken: already verified blocks (up to {ckpt['index']}) were modified. Run chain_verify full to locate it."
+    checked = 0
+    with open(path, 'rb') as f:
+        f.seek(ckpt['offset'])
+        for raw in f:
+            expect = ckpt['index'] + 1
+            try: block = json.loads(raw)
+            except ValueError: return f"Chain broken at block {expect}: unreadable block."
+            if not isinstance(block, dict) or not {'index', 'prev', 'hash'} <= block.keys():
+                return f"Chain broken at block {expect}: malformed block."
+            if block['index'] != expect: return f"Chain broken at block {expect}: index {block['index']} out of order."
+            if block['prev'] != ckpt['hash']: return f"Chain broken at block {expect}: prev hash mismatch."
+            if block_hash(block) != block['hash']: return f"Chain broken at block {expect}: block was modified."
+            ckpt = {"offset": ckpt['offset'] + len(raw), "index": block['index'], "hash": block['hash']}
+            checked += 1
+            if checked % 1000 == 0: ckpt_path.write_text(json.dumps(ckpt))
+    ckpt_path.write_text(json.dumps(ckpt))
+    return f"Chain OK: {ckpt['index'] + 1} blocks ({checked} newly verified)."
 
 def register(config):
-    return {'chain_view': view, 'log': log}
\ No newline at end of file
+    return {'chain_view': view, 'log': log, 'chain_verify': verify}
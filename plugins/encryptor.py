@@ -1,39 +1,133 @@
-import json
+import json, os, threading, uuid
+from contextlib import contextmanager
+from functools import lru_cache
+from pathlib import Path
 from Crypto.Cipher import AES
 from Crypto.Random import get_random_bytes
 
+try:
+    import fcntl
+except ImportError: # Windows: fall back to in-process locking only
+    fcntl = None
+
+# Vault layout: <VAULT_FILE>.d/index holds {title: record id}, encrypted; every note body
+# is its own record under <VAULT_FILE>.d/records/. Each blob is nonce | tag | ciphertext.
+_indexes = {} # vault dir -> (index mtime, {title: record id})
+_lock = threading.Lock() # plugin commands run on a thread pool
+
+@lru_cache(maxsize=8)
+def _parse_key(hex_key):
+    return bytes.fromhex(hex_key)
+
 def get_key(config):
-    return bytes.fromhex(config['ENCRYPTION_KEY'])
+    return _parse_key(config['ENCRYPTION_KEY'])
+
+def vault_dir(config):
+    return Path(str(config['VAULT_FILE']) + '.d')
+
+def seal(key, data, aad):
+    cipher = AES.new(key, AES.MODE_GCM, nonce=get_random_bytes(12))
+    cipher.update(aad)
+    text, tag = cipher.encrypt_and_digest(data)
+    return cipher.nonce + tag + text
+
+def unseal(key, blob, aad):
+    cipher = AES.new(key, AES.MODE_GCM, nonce=blob[:12])
+    cipher.update(aad)
+    return cipher.decrypt_and_verify(blob[28:], blob[12:28])
 
-def load(config):
+def _atomic_write(path, blob):
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(blob); f.flush(); os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+def load_legacy(config):
+    """The old single-blob vault: the whole {title: body} dict in one ciphertext.
+    It was written with PyCryptodome's default 16-byte GCM nonce."""
     try:
         with open(config['VAULT_FILE'], 'rb') as f:
-            nonce, tag, text = [f.read(x) for x in (12, 16, -1)]
+            nonce, tag, text = [f.read(x) for x in (16, 16, -1)]
         cipher = AES.new(get_key(config), AES.MODE_GCM, nonce=nonce)
         return json.loads(cipher.decrypt_and_verify(text, tag))
     except: return {}
 
-def save(config, data):
-    cipher = AES.new(get_key(config), AES.MODE_GCM)
-    text, tag = cipher.encrypt_and_digest(json.dumps(data).encode())
-    with open(config['VAULT_FILE'], 'wb') as f:
-        [f.write(x) for x in (cipher.nonce, tag, text)]
+@contextmanager
+def _writing(config):
+    """Serialize index read-modify-write across threads, and across processes where flock exists."""
+    with _lock:
+        if fcntl is None:
+            yield; return
+        vdir = vault_dir(config)
+        vdir.mkdir(parents=True, exist_ok=True)
+        with open(vdir / 'lock', 'w') as lf:
+            fcntl.flock(lf, fcntl.LOCK_EX)
+            try: yield
+            finally: fcntl.flock(lf, fcntl.LOCK_UN)
+
+def load_index(config):
+    """Decrypted title index, cached until the index file changes."""
+    if not (vault_dir(config) / 'index').exists():
+        with _writing(config):
+            if not (vault_dir(config) / 'index').exists(): _migrate(config)
+    return _read_index(config)
+
+def _read_index(config, fresh=False):
+    vdir = vault_dir(config)
+    path = vdir / 'index'
+    if not path.exists(): return {}
+    mtime = path.stat().st_mtime_ns
+    cached = _indexes.get(str(vdir))
+    if cached and cached[0] == mtime and not fresh: return cached[1]
+    index = json.loads(unseal(get_key(config), path.read_bytes(), b'index'))
+    _indexes[str(vdir)] = (mtime, index)
+    return index
+
+def save_index(config, index):
+    path = vault_dir(config) / 'index'
+    _atomic_write(path, seal(get_key(config), json.dumps(index).encode(), b'index'))
+    _indexes[str(vault_dir(config))] = (path.stat().st_mtime_ns, index)
+
+def put_note(config, index, title, body):
+    rid = index.get(title) or uuid.uuid4().hex
+    records = vault_dir(config) / 'records'
+    records.mkdir(parents=True, exist_ok=True)
+    _atomic_write(records / rid, seal(get_key(config), body.encode(), rid.encode()))
+    index[title] = rid
+
+def _migrate(config):
+    legacy = Path(config['VAULT_FILE'])
+    if not legacy.exists(): return
+    notes = load_legacy(config)
+    if not notes: return
+    index = {}
+    for title, body in notes.items(): put_note(config, index, title, body)
+    save_index(config, index)
+    os.replace(legacy, legacy.with_name(legacy.name + '.legacy'))
 
 def write(config, args):
+    """Title :: Body: save an encrypted note."""
     try:
         title, body = args.split(' :: ', 1)
-        data = load(config)
-        data[title] = body
-        save(config, data)
+        load_index(config) # migrates a legacy vault first
+        with _writing(config):
+            # Re-read under the lock: another writer may have just saved
+            index = dict(_read_index(config, fresh=True))
+            put_note(config, index, title, body)
+            save_index(config, index)
         return "Note saved encrypted."
     except: return "Usage: note Title :: Body"
 
 def read(config, title):
-    data = load(config)
-    return data.get(title, "Not found.")
+    """Title: decrypt and show one note."""
+    rid = load_index(config).get(title)
+    if not rid: return "Not found."
+    try: return unseal(get_key(config), (vault_dir(config) / 'records' / rid).read_bytes(), rid.encode()).decode()
+    except: return "Not found."
 
 def list_notes(config, args=None):
-    return ", ".join(load(config).keys()) or "Empty vault."
+    """List note titles."""
+    return ", ".join(load_index(config).keys()) or "Empty vault."
 
 def register(config):
-    return {'note': write, 'vault_read': read, 'vault_list': list_notes}
\ No newline at end of file
+    return {'note': write, 'vault_read': read, 'vault_list': list_notes}
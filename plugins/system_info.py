@@ -1,8 +1,85 @@
+import os, threading, time
+from collections import deque
 import psutil
 import platform
 
+FIELDS = [
+    ("cpu", "CPU %"), ("ram", "RAM %"), ("disk", "Disk %"),
+    ("net_up", "Net up KB/s"), ("net_down", "Net down KB/s"),
+    ("app_cpu", "App CPU %"), ("app_rss", "App RSS MB"),
+]
+
+class Sampler:
+    """Background thread filling a fixed-size ring buffer with system and process stats."""
+
+    def __init__(self, interval=2.0, size=300, disk_path="/"):
+        self.interval = interval
+        self.samples = deque(maxlen=size)
+        self.disk_path = disk_path
+        self.proc = psutil.Process(os.getpid()) # the Streamlit server itself
+        self.stop = threading.Event()
+        self.net = None
+        # Prime the counters so the first real sample covers a real interval
+        psutil.cpu_percent(None); self.proc.cpu_percent(None)
+        self.sample(first_wait=0.1)
+        self.thread = threading.Thread(target=self._loop, name="kai-sysinfo", daemon=True)
+        self.thread.start()
+
+    def sample(self, first_wait=0.0):
+        if first_wait: time.sleep(first_wait)
+        now = time.monotonic()
+        net = psutil.net_io_counters()
+        up = down = 0.0
+        if self.net:
+            dt = max(now - self.net[0], 1e-6)
+            up = (net.bytes_sent - self.net[1].bytes_sent) / dt / 1024
+            down = (net.bytes_recv - self.net[1].bytes_recv) / dt / 1024
+        self.net = (now, net)
+        self.samples.append({
+            "t": now,
+            "cpu": psutil.cpu_percent(None),
+            "ram": psutil.virtual_memory().percent,
+            "disk": psutil.disk_usage(self.disk_path).percent,
+            "net_up": up, "net_down": down,
+            "app_cpu": self.proc.cpu_percent(None),
+            "app_rss": self.proc.memory_info().rss / 2 ** 20,
+        })
+
+    def window(self, seconds):
+        cutoff = time.monotonic() - seconds
+        return [s for s in list(self.samples) if s["t"] >= cutoff]
+
+    def _loop(self):
+        while not self.stop.wait(self.interval):
+            try: self.sample()
+            except Exception: pass
+
+_sampler = None
+_lock = threading.Lock()
+
+def get_sampler(config):
+    global _sampler
+    with _lock:
+        if _sampler is None:
+            _sampler = Sampler(float(config.get('SYSTEM_SAMPLE_INTERVAL', 2.0)), int(config.get('SYSTEM_SAMPLE_SIZE', 300)))
+        return _sampler
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))]
+
 def get_system(config, args=None):
-    return f"System: {platform.system()}\nCPU: {psutil.cpu_percent()}%\nRAM: {psutil.virtual_memory().percent}%"
+    """[seconds]: OS, CPU, RAM, disk, network and app stats (now/min/avg/max/p95 over the window, default 60s)."""
+    try: seconds = float(args) if args else 60.0
+    except ValueError: return "Usage: system [seconds]"
+    sampler = get_sampler(config)
+    samples = sampler.window(seconds) or list(sampler.samples)[-1:]
+    lines = [f"System: {platform.system()}", f"Window: {seconds:g}s ({len(samples)} samples @ {sampler.interval:g}s)",
+             f"{'':<14}{'now':>8}{'min':>8}{'avg':>8}{'max':>8}{'p95':>8}"]
+    for key, label in FIELDS:
+        vals = [s[key] for s in samples]
+        lines.append(f"{label:<14}{vals[-1]:>8.1f}{min(vals):>8.1f}{sum(vals) / len(vals):>8.1f}{max(vals):>8.1f}{percentile(vals, 95):>8.1f}")
+    return "\n".join(lines)
 
 def register(config):
-    return {'system': get_system}
\ No newline at end of file
+    return {'system': get_system}
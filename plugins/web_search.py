@@ -0,0 +1,234 @@
+import codecs, hashlib, ipaddress, json, re, socket, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from pathlib import Path
+from urllib.parse import parse_qs, quote_plus, urljoin, urlparse
+import requests
+
+# Config keys (all optional):
+#   SEARCH_URL        results page template with {query}; point it at a local stub to run offline
+#   WEB_CACHE_DIR     TTL cache of extracted page text, one JSON file per URL
+#   WEB_CACHE_TTL     seconds a cached page stays fresh
+#   WEB_TIMEOUT       connect/read timeout per request
+#   WEB_HOST_INTERVAL minimum seconds between requests to the same host
+#   WEB_RESULTS       pages fetched per search
+#   WEB_MAX_CHARS     text kept per page
+#   WEB_ALLOW_PRIVATE allow loopback/private/link-local targets (offline testing only)
+#   WEB_MAX_REDIRECTS redirects followed per fetch, each one re-checked
+DEFAULTS = {
+    'SEARCH_URL': "https://html.duckduckgo.com/html/?q={query}",
+    'WEB_CACHE_DIR': Path("data/web_cache"),
+    'WEB_CACHE_TTL': 3600.0,
+    'WEB_TIMEOUT': 8.0,
+    'WEB_HOST_INTERVAL': 1.0,
+    'WEB_RESULTS': 4,
+    'WEB_MAX_CHARS': 4000,
+    'WEB_ALLOW_PRIVATE': False,
+    'WEB_MAX_REDIRECTS': 5,
+}
+SKIP_TAGS = {'script', 'style', 'noscript', 'nav', 'header', 'footer', 'svg', 'form', 'head'}
+BLOCK_TAGS = {'p', 'div', 'br', 'li', 'tr', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'section', 'article'}
+
+def opt(config, name):
+    return config.get(name, DEFAULTS[name])
+
+class TextExtractor(HTMLParser):
+    """Incremental HTML -> readable text; also collects the title and outgoing links."""
+
+    def __init__(self, max_chars):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.parts, self.size = [], 0
+        self.links, self.title = [], ""
+        self.skip = 0
+        self.in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS: self.skip += 1
+        if tag == 'title': self.in_title = True
+        if tag == 'a':
+            href = dict(attrs).get('href')
+            if href: self.links.append(href)
+        if tag in BLOCK_TAGS and self.parts and self.parts[-1] != "\n": self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS and self.skip: self.skip -= 1
+        if tag == 'title': self.in_title = False
+
+    def handle_data(self, data):
+        if self.in_title: self.title += data.strip(); return
+        text = " ".join(data.split())
+        if self.skip or not text or self.full(): return
+        self.parts.append(text + " "); self.size += len(text) + 1
+
+    def full(self): return self.size >= self.max_chars
+
+    def text(self):
+        return "\n".join(l.strip() for l in "".join(self.parts).splitlines() if l.strip())[:self.max_chars]
+
+class BlockedURL(ValueError):
+    """The URL is not http(s) or points at an address the server must not reach."""
+
+def check_url(url, allow_private=False):
+    """Refuse non-http(s) URLs and hosts resolving to loopback, private, link-local
+    (cloud metadata) or otherwise non-public addresses."""
+    parsed = urlparse(url)
+    if parsed.scheme not in ('http', 'https') or not parsed.hostname: raise BlockedURL(f"Only http(s) URLs are allowed: {url}")
+    if allow_private: return
+    try: infos = socket.getaddrinfo(parsed.hostname, parsed.port or (443 if parsed.scheme == 'https' else 80), proto=socket.IPPROTO_TCP)
+    except socket.gaierror as e: raise BlockedURL(f"Cannot resolve {parsed.hostname}: {e}")
+    for info in infos:
+        ip = ipaddress.ip_address(info[4][0].split('%')[0])
+        if getattr(ip, 'ipv4_mapped', None): ip = ip.ipv4_mapped
+        if not ip.is_global or ip.is_multicast: raise BlockedURL(f"Refusing to fetch non-public address {ip} ({parsed.hostname})")
+
+def page_encoding(content_type, head):
+    """Charset declared in the Content-Type header, else in a <meta> tag within `head`, else UTF-8.
+    (requests' resp.encoding assumes ISO-8859-1 for any text/* without a charset.)"""
+    m = re.search(r'charset=["\']?([\w.:-]+)', content_type or "", re.I) or \
+        re.search(rb'<meta[^>]+charset=["\']?([\w.:-]+)', head, re.I)
+    if m:
+        name = m.group(1) if isinstance(m.group(1), str) else m.group(1).decode("ascii")
+        try: return codecs.lookup(name).name
+        except LookupError: pass
+    return "utf-8"
+
+class HostLimiter:
+    """Spaces out requests to the same host by at least `interval` seconds."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.next_slot = {}
+
+    def wait(self, host):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot.get(host, now))
+            self.next_slot[host] = slot + self.interval
+        if slot > now: time.sleep(slot - now)
+
+class WebClient:
+    """Pooled HTTP session, per-host limits and a URL-keyed TTL disk cache."""
+
+    def __init__(self, config):
+        self.config = config
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=16, pool_maxsize=16)
+        self.session.mount("http://", adapter); self.session.mount("https://", adapter)
+        self.session.headers["User-Agent"] = "KitKatAI/5.0 (+web_search plugin)"
+        self.limiter = HostLimiter(opt(config, 'WEB_HOST_INTERVAL'))
+        self.pool = ThreadPoolExecutor(8, thread_name_prefix="kai-web")
+        self.cache_dir = Path(opt(config, 'WEB_CACHE_DIR'))
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.stats = {"fetches": 0, "cache_hits": 0, "errors": 0}
+
+    def cache_path(self, url):
+        return self.cache_dir / (hashlib.sha256(url.encode()).hexdigest() + ".json")
+
+    def cached(self, url):
+        try: entry = json.loads(self.cache_path(url).read_text())
+        except (OSError, ValueError): return None
+        if time.time() - entry["fetched"] > opt(self.config, 'WEB_CACHE_TTL'): return None
+        return entry
+
+    def allowed(self, url):
+        try: check_url(url, opt(self.config, 'WEB_ALLOW_PRIVATE')); return True
+        except BlockedURL: return False
+
+    def fetch(self, url, max_chars=None, use_cache=True, trusted=False):
+        """{url, title, text, links}; the body is parsed as it streams and the download stops once enough text is in.
+
+        Unless `trusted` (the configured search page), the URL and every redirect hop must pass check_url.
+        """
+        if not trusted: check_url(url, opt(self.config, 'WEB_ALLOW_PRIVATE'))
+        if use_cache:
+            entry = self.cached(url)
+            if entry: self.stats["cache_hits"] += 1; return entry
+        self.stats["fetches"] += 1
+        parser = TextExtractor(max_chars or opt(self.config, 'WEB_MAX_CHARS'))
+        with self._get(url, trusted) as resp:
+            resp.raise_for_status()
+            decoder = None
+            for chunk in resp.iter_content(8192):
+                if decoder is None: decoder = codecs.getincrementaldecoder(page_encoding(resp.headers.get("Content-Type"), chunk[:4096]))(errors="replace")
+                parser.feed(decoder.decode(chunk))
+                if parser.full(): break
+            final = resp.url
+        parser.close()
+        entry = {"url": final, "title": parser.title, "text": parser.text(),
+                 "links": [urljoin(final, l) for l in parser.links], "fetched": time.time()}
+        if use_cache: self.cache_path(url).write_text(json.dumps(entry))
+        return entry
+
+    def _get(self, url, trusted):
+        """Streaming GET that follows redirects by hand so each hop can be checked."""
+        for _ in range(opt(self.config, 'WEB_MAX_REDIRECTS') + 1):
+            self.limiter.wait(urlparse(url).netloc)
+            resp = self.session.get(url, stream=True, timeout=opt(self.config, 'WEB_TIMEOUT'), allow_redirects=False)
+            if not resp.is_redirect: return resp
+            resp.close()
+            url = urljoin(url, resp.headers['Location'])
+            if not trusted or urlparse(url).netloc != urlparse(resp.url).netloc:
+                check_url(url, opt(self.config, 'WEB_ALLOW_PRIVATE')); trusted = False
+        raise BlockedURL(f"Too many redirects: {url}")
+
+    def search(self, query):
+        page = self.fetch(opt(self.config, 'SEARCH_URL').format(query=quote_plus(query)), max_chars=10 ** 6, use_cache=False, trusted=True)
+        urls = [u for u in result_links(page["links"], urlparse(page["url"]).netloc) if self.allowed(u)][:opt(self.config, 'WEB_RESULTS')]
+        futures = [self.pool.submit(self.fetch, u) for u in urls]
+        results = []
+        for f in futures:
+            try: results.append(f.result())
+            except Exception: self.stats["errors"] += 1
+        return results
+
+def result_links(links, search_host):
+    """External result URLs in page order, unwrapping redirect links like /l/?uddg=<url>."""
+    seen, out = set(), []
+    for link in links:
+        parsed = urlparse(link)
+        target = parse_qs(parsed.query).get('uddg', [None])[0]
+        if target: parsed = urlparse(target); link = target
+        # Links back into the search engine are navigation, not results (unless unwrapped from a redirect)
+        if parsed.scheme not in ('http', 'https') or (parsed.netloc == search_host and not target) or link in seen: continue
+        seen.add(link); out.append(link)
+    return out
+
+_client = None
+_lock = threading.Lock()
+
+def get_client(config):
+    global _client
+    with _lock:
+        if _client is None: _client = WebClient(config)
+        return _client
+
+def prompt_context(results, per_page=1500):
+    """Search results formatted to prepend to a model prompt."""
+    blocks = [f"[{i}] {r['title'] or r['url']}\n{r['url']}\n{r['text'][:per_page]}" for i, r in enumerate(results, 1)]
+    return "Web results:\n\n" + "\n\n".join(blocks)
+
+def search(config, args):
+    """<query>: search the web and show the top pages."""
+    if not args: return "Usage: search <query>"
+    results = get_client(config).search(args)
+    if not results: return "No results."
+    return "\n\n".join(f"[{i}] {r['title'] or r['url']}\n{r['url']}\n{r['text'][:300]}" for i, r in enumerate(results, 1))
+
+def fetch(config, args):
+    """<url>: show the readable text of one page."""
+    if not args: return "Usage: fetch <url>"
+    try: page = get_client(config).fetch(args.strip())
+    except BlockedURL as e: return f"Blocked: {e}"
+    return f"{page['title']}\n{page['url']}\n\n{page['text']}"
+
+def ask(config, args):
+    """<question>: answer with web results injected into the model prompt."""
+    if not args: return "Usage: ask <question>"
+    results = get_client(config).search(args)
+    context = prompt_context(results) if results else "Web results: none found."
+    return {"prompt": f"{context}\n\nUsing the web results above where relevant (cite them as [n]), answer:\n{args}"}
+
+def register(config):
+    return {'search': search, 'fetch': fetch, 'ask': ask}